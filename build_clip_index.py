@@ -1,42 +1,455 @@
 import argparse
+import hashlib
 import json
 import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Iterable, List
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
 
 import numpy as np
-import open_clip
 import torch
 from PIL import Image
+from torch.utils.data import DataLoader, Dataset
+
+from clip_backend import BACKENDS, DEFAULT_BACKEND, VisionEncoder, load_vision_encoder
+from clip_store import (
+    META_FORMAT_VERSION,
+    ROOT_KINDS,
+    build_embed_path,
+    load_metadata,
+    manifest_path,
+    published_embeddings,
+    remove_stale_builds,
+    write_manifest,
+)
 
 IMAGE_EXT = {".jpg", ".jpeg", ".png", ".bmp"}
 DEFAULT_MODEL = os.getenv("CLIP_MODEL", "ViT-B-32")
 DEFAULT_PRETRAINED = os.getenv("CLIP_PRETRAINED", "laion2b_s34b_b79k")
 DEFAULT_DEVICE = os.getenv("CLIP_DEVICE", "cuda" if torch.cuda.is_available() else "cpu")
+DEFAULT_BATCH_SIZE = int(os.getenv("CLIP_BATCH", "32"))
+DEFAULT_WORKERS = int(os.getenv("CLIP_WORKERS", str(min(4, os.cpu_count() or 1))))
+DEFAULT_SCAN_WORKERS = int(os.getenv("CLIP_SCAN_WORKERS", "8"))
+DEFAULT_THREADS = int(os.getenv("CLIP_TORCH_THREADS", "0"))
+
+
+class ImageFile(NamedTuple):
+    path: Path
+    mtime: float
+    size: int
+
+
+class ScanCache:
+    """Klasör mtime'ına göre anahtarlanmış dizin listesi önbelleği.
+
+    Bir klasörün mtime'ı değişmemişse listesi yeniden okunmaz; yalnızca
+    klasörün kendisi stat edilir. Yerinde üzerine yazılan dosyalar klasör
+    mtime'ını değiştirmediğinden bu önbellek onları fark etmez.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._previous: Dict[str, dict] = {}
+        self._current: Dict[str, dict] = {}
+        if path.exists():
+            try:
+                with path.open("r", encoding="utf-8") as fh:
+                    self._previous = json.load(fh)
+            except (OSError, ValueError):
+                print(f"Tarama önbelleği okunamadı, yok sayılıyor: {path}")
+
+    def get(self, folder: str, mtime: float) -> Optional[dict]:
+        cached = self._previous.get(folder)
+        if cached is None or cached["mtime"] != mtime:
+            return None
+        self._current[folder] = cached
+        return cached
+
+    def put(self, folder: str, mtime: float, files: list, dirs: list) -> None:
+        self._current[folder] = {"mtime": mtime, "files": files, "dirs": dirs}
+
+    def save(self) -> None:
+        # Yalnızca bu taramada görülen klasörler yazılır; silinenler düşer.
+        temp = self.path.with_name(f"{self.path.stem}.tmp{self.path.suffix}")
+        with temp.open("w", encoding="utf-8") as fh:
+            json.dump(self._current, fh, ensure_ascii=False)
+        os.replace(temp, self.path)
 
 
-def iter_images(root: Path) -> Iterable[Path]:
-    if not root or not root.exists():
+def _list_dir(folder: str, cache: Optional[ScanCache]) -> Tuple[list, list]:
+    """Klasördeki görselleri ve alt klasörleri döner; listeleme hatası OSError fırlatır."""
+    mtime = 0.0
+    if cache is not None:
+        mtime = os.stat(folder).st_mtime
+        cached = cache.get(folder, mtime)
+        if cached is not None:
+            return cached["files"], cached["dirs"]
+    files, dirs = [], []
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            try:
+                # DirEntry tür bilgisini listelemeden alır; Windows'ta stat()
+                # da ek ağ isteği yapmaz.
+                if entry.is_dir(follow_symlinks=False):
+                    dirs.append(entry.name)
+                elif os.path.splitext(entry.name)[1].lower() in IMAGE_EXT and entry.is_file():
+                    stat = entry.stat()
+                    files.append([entry.name, stat.st_mtime, stat.st_size])
+            except (FileNotFoundError, PermissionError):
+                # Listeleme sırasında silinen ya da okunamayan tek bir dosya.
+                continue
+    files.sort()
+    dirs.sort()
+    if cache is not None:
+        cache.put(folder, mtime, files, dirs)
+    return files, dirs
+
+
+def _walk(folder: Path, cache: Optional[ScanCache], failed: List[Path]) -> List[ImageFile]:
+    try:
+        files, dirs = _list_dir(str(folder), cache)
+    except PermissionError:
+        # rglob gibi erişim izni olmayan klasörler atlanır.
+        return []
+    except OSError as exc:
+        # Geçici ağ hatası klasörü boş göstermesin; çağıran önceki satırları korur.
+        print(f"Klasör listelenemedi: {folder} ({exc})")
+        failed.append(folder)
         return []
-    for path in root.rglob("*"):
-        if path.is_file() and path.suffix.lower() in IMAGE_EXT:
-            yield path
+    found = [ImageFile(folder / name, mtime, size) for name, mtime, size in files]
+    for name in dirs:
+        found.extend(_walk(folder / name, cache, failed))
+    return found
+
+
+def scan_images(
+    root: Path, workers: int = DEFAULT_SCAN_WORKERS, cache: Optional[ScanCache] = None
+) -> Tuple[List[ImageFile], List[Path]]:
+    """Kök altındaki görselleri os.scandir ile bulur.
+
+    Paylaşımlar gecikme sınırlı olduğundan üst seviye alt klasörler ayrı
+    thread'lerde taranır. Listelenemeyen alt klasörler ikinci değer olarak
+    döner; kökün kendisi listelenemezse OSError fırlatılır.
+    """
+    failed: List[Path] = []
+    files, dirs = _list_dir(str(root), cache)
+    found = [ImageFile(root / name, mtime, size) for name, mtime, size in files]
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for sub in pool.map(lambda name: _walk(root / name, cache, failed), dirs):
+            found.extend(sub)
+    return found, failed
+
+
+class ImageDataset(Dataset):
+    """Görselleri DataLoader işçilerinde decode edip ön işlemden geçirir."""
+
+    def __init__(self, paths: Sequence[Path], preprocess) -> None:
+        self._paths = list(paths)
+        self._preprocess = preprocess
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def __getitem__(self, index: int) -> Tuple[int, Optional[torch.Tensor]]:
+        try:
+            image = Image.open(self._paths[index]).convert("RGB")
+            return index, self._preprocess(image)
+        except Exception:
+            # Bozuk/okunamayan dosya tüm batch'i düşürmesin; ana süreç raporlar.
+            return index, None
+
+
+def _collate(batch: List[Tuple[int, Optional[torch.Tensor]]]):
+    indices = [index for index, tensor in batch if tensor is not None]
+    failed = [index for index, tensor in batch if tensor is None]
+    tensors = [tensor for _, tensor in batch if tensor is not None]
+    stacked = torch.stack(tensors) if tensors else None
+    return indices, stacked, failed
+
+
+def encode_batches(
+    encoder: VisionEncoder,
+    preprocess,
+    paths: Sequence[Path],
+    batch_size: int,
+    workers: int,
+) -> Iterator[Tuple[List[int], np.ndarray, List[int]]]:
+    """Görselleri sabit boyutlu batch'ler halinde vektörler.
+
+    Decode/ön işlem `workers` adet süreçte yapılır ve model bir batch'i işlerken
+    sonraki batch'ler hazırlanır. Sıra korunur; her adımda (indeksler, vektörler,
+    okunamayan indeksler) döner.
+    """
+    loader = DataLoader(
+        ImageDataset(paths, preprocess),
+        batch_size=max(1, batch_size),
+        num_workers=max(0, workers),
+        collate_fn=_collate,
+        pin_memory=encoder.device.startswith("cuda"),
+    )
+    for indices, tensor, failed in loader:
+        if tensor is None:
+            yield indices, np.empty((0, 0), dtype="float32"), failed
+            continue
+        yield indices, encoder.encode(tensor), failed
+
+
+def train_ivf(
+    embeddings: np.ndarray, n_lists: int, iterations: int = 20, seed: int = 0
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Normalize vektörler üzerinde küresel k-means ile IVF listeleri oluşturur.
+
+    Dönüş: (centroids, order, offsets). `order[offsets[c]:offsets[c + 1]]`,
+    c numaralı listeye düşen satır indeksleridir.
+    """
+    rng = np.random.default_rng(seed)
+    total = embeddings.shape[0]
+    n_lists = max(1, min(n_lists, total))
+    sample = embeddings[rng.choice(total, size=min(total, n_lists * 256), replace=False)]
+    centroids = sample[rng.choice(sample.shape[0], size=n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, sample)
+        norms = np.linalg.norm(sums, axis=1)
+        empty = norms == 0
+        if empty.any():
+            sums[empty] = sample[rng.choice(sample.shape[0], size=int(empty.sum()), replace=False)]
+            norms[empty] = np.linalg.norm(sums[empty], axis=1)
+        centroids = (sums / norms[:, None]).astype("float32")
+
+    assign = np.concatenate(
+        [np.argmax(embeddings[start:start + 8192] @ centroids.T, axis=1) for start in range(0, total, 8192)]
+    )
+    order = np.argsort(assign, kind="stable").astype("int32")
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=n_lists))]).astype("int64")
+    return centroids, order, offsets
+
+
+def quantized_paths(embed_path: Path) -> Dict[str, Tuple[Path, ...]]:
+    return {
+        "float16": (embed_path.with_suffix(".f16.npy"),),
+        "int8": (embed_path.with_suffix(".i8.npy"), embed_path.with_suffix(".i8-scale.npy")),
+    }
+
+
+def quantize_int8(embeddings: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Satır başına ölçekli simetrik int8 kuantizasyon: x ≈ codes * scale."""
+    scales = np.abs(embeddings).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(embeddings / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def compute_neighbors(
+    embeddings: np.ndarray, k: int, block_rows: int = 1024
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Her satırın kendisi hariç en yakın `k` komşusunu bulur.
+
+    Matris `block_rows x block_rows` karolar halinde çarpılır ve her karonun
+    adayları satır başına tutulan top-k listesiyle birleştirilir; bellek
+    kullanımı arşiv boyutundan bağımsızdır.
+    """
+    total = embeddings.shape[0]
+    k = max(1, min(k, total - 1))
+    indices = np.empty((total, k), dtype=np.int32)
+    scores = np.empty((total, k), dtype=np.float16)
+    for start in range(0, total, block_rows):
+        block = np.asarray(embeddings[start:start + block_rows], dtype=np.float32)
+        rows = np.arange(block.shape[0])
+        best_idx = np.empty((block.shape[0], 0), dtype=np.int64)
+        best_scores = np.empty((block.shape[0], 0), dtype=np.float32)
+        for col_start in range(0, total, block_rows):
+            sims = block @ np.asarray(embeddings[col_start:col_start + block_rows], dtype=np.float32).T
+            if col_start == start:
+                sims[rows, rows] = -np.inf
+            cols = np.broadcast_to(np.arange(col_start, col_start + sims.shape[1]), sims.shape)
+            best_scores = np.concatenate([best_scores, sims], axis=1)
+            best_idx = np.concatenate([best_idx, cols], axis=1)
+            if best_scores.shape[1] > k:
+                top = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                best_scores = np.take_along_axis(best_scores, top, axis=1)
+                best_idx = np.take_along_axis(best_idx, top, axis=1)
+        order = np.argsort(-best_scores, axis=1)
+        indices[start:start + block.shape[0]] = np.take_along_axis(best_idx, order, axis=1)
+        scores[start:start + block.shape[0]] = np.take_along_axis(best_scores, order, axis=1)
+    return indices, scores
 
 
-def load_model(model_name: str, pretrained: str, device: str):
-    model, _, preprocess = open_clip.create_model_and_transforms(model_name, pretrained=pretrained)
-    model.eval()
-    model.to(device)
-    return model, preprocess
+def content_hash(path: Path) -> str:
+    digest = hashlib.sha1()
+    with path.open("rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
 
 
-def encode_image(model, preprocess, device: str, image_path: Path) -> np.ndarray:
-    image = Image.open(image_path).convert("RGB")
-    tensor = preprocess(image).unsqueeze(0).to(device)
-    with torch.no_grad():
-        feats = model.encode_image(tensor)
-    feats = feats / feats.norm(dim=-1, keepdim=True)
-    return feats.cpu().numpy().astype("float32")[0]
+def _intern(values: Iterable[str]) -> Tuple[List[str], np.ndarray]:
+    table: Dict[str, int] = {}
+    ids = [table.setdefault(value, len(table)) for value in values]
+    return list(table), np.asarray(ids, dtype=np.int32)
+
+
+def save_columnar_metadata(
+    path: Path, metadata: List[dict], roots: List[Path], root_ids: List[int], build_id: str
+) -> None:
+    """Metadata'yı sütunlu `.npz` olarak yazar.
+
+    Kök klasörler, kök altındaki dizin önekleri ve klasör adları birer string
+    tablosunda tutulur, satırlar bu tablolara indeks taşır. Dosya adları tek bir
+    UTF-8 bayt dizisinde, `name_offsets` ile dilimlenerek saklanır. Tam yol
+    `roots[root_id] + dirs[dir_id] + ad` ile yeniden kurulur.
+    """
+    root_strings = [str(root) for root in roots]
+    dir_table, dir_ids = _intern(
+        entry["path"][len(root_strings[root_id]):len(entry["path"]) - len(entry["fileName"])]
+        for entry, root_id in zip(metadata, root_ids)
+    )
+    folder_table, folder_ids = _intern(entry["folder"] for entry in metadata)
+    encoded = [entry["fileName"].encode("utf-8") for entry in metadata]
+    name_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(name) for name in encoded], out=name_offsets[1:])
+    columns = {
+        "version": np.int32(META_FORMAT_VERSION),
+        "build_id": np.array(build_id),
+        "roots": np.array(root_strings, dtype=str),
+        "root_kinds": np.array(ROOT_KINDS[: len(root_strings)], dtype=str),
+        "root_id": np.asarray(root_ids, dtype=np.int16),
+        "dirs": np.array(dir_table, dtype=str),
+        "dir_id": dir_ids,
+        "folders": np.array(folder_table, dtype=str),
+        "folder_id": folder_ids,
+        "names": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+        "name_offsets": name_offsets,
+        "mtime": np.array([entry.get("mtime", 0.0) for entry in metadata], dtype=np.float64),
+        "size": np.array([entry.get("size", -1) for entry in metadata], dtype=np.int64),
+    }
+    hashes = [entry.get("sha1", "") for entry in metadata]
+    if any(hashes):
+        columns["sha1"] = np.array(hashes, dtype="S40")
+    with path.open("wb") as fh:
+        np.savez(fh, **columns)
+
+
+def load_existing_index(
+    embed_path: Path, meta_path: Path, meta_npz_path: Path
+) -> Tuple[Optional[np.ndarray], List[dict]]:
+    """Önceki çalıştırmanın çıktısını okur; yoksa veya tutarsızsa boş döner."""
+    embed_path = published_embeddings(embed_path)[0]
+    if not embed_path.exists() or not (meta_npz_path.exists() or meta_path.exists()):
+        return None, []
+    embeddings = np.load(embed_path, mmap_mode="r")
+    metadata = load_metadata(meta_path, meta_npz_path)
+    if embeddings.ndim != 2 or embeddings.shape[0] != len(metadata):
+        print("Mevcut index tutarsız, tamamı yeniden oluşturulacak")
+        return None, []
+    return embeddings, metadata
+
+
+def _temp_path(path: Path) -> Path:
+    return path.with_name(f"{path.stem}.tmp{path.suffix}")
+
+
+def publish_npy(path: Path, array: np.ndarray) -> None:
+    # Önce geçici dosyaya yazılır, sonra tek adımda yerine taşınır; servis
+    # hiçbir zaman yarım yazılmış bir dosya görmez.
+    temp = _temp_path(path)
+    with temp.open("wb") as fh:
+        np.save(fh, array)
+    os.replace(temp, path)
+
+
+def publish_npz(path: Path, **arrays: np.ndarray) -> None:
+    temp = _temp_path(path)
+    with temp.open("wb") as fh:
+        np.savez(fh, **arrays)
+    os.replace(temp, path)
+
+
+class BuildCheckpoint:
+    """Vektörlenen satırları diske akıtır ve periyodik kontrol noktası yazar.
+
+    Satırlar `<embed>.partial.f32` dosyasına ham float32 olarak eklenir;
+    `<embed>.checkpoint.json` bu satırların hangi dosyaya (yol, mtime, boyut)
+    ait olduğunu ve modeli tutar. Son kontrol noktasından sonra yazılmış
+    satırlar yeniden çalıştırmada kesilip atılır.
+    """
+
+    def __init__(self, embed_path: Path, model: str, pretrained: str) -> None:
+        self.data_path = embed_path.with_suffix(".partial.f32")
+        self.state_path = embed_path.with_suffix(".checkpoint.json")
+        self._model = [model, pretrained]
+        self.dim: Optional[int] = None
+        self.entries: List[list] = []
+        self._fh = None
+
+    def load(self) -> Dict[Tuple[str, float, int], int]:
+        """Önceki çalıştırmada vektörlenmiş dosyaları satır numaralarıyla döner."""
+        if not self.state_path.exists() or not self.data_path.exists():
+            return {}
+        with self.state_path.open("r", encoding="utf-8") as fh:
+            state = json.load(fh)
+        if state.get("model") != self._model:
+            print("Kontrol noktası farklı bir modele ait, yok sayılıyor")
+            return {}
+        self.dim = state["dim"]
+        self.entries = state["entries"]
+        with self.data_path.open("r+b") as fh:
+            fh.truncate(len(self.entries) * self.dim * 4)
+        return {tuple(entry): row for row, entry in enumerate(self.entries)}
+
+    def append(self, entries: List[dict], vectors: np.ndarray) -> List[int]:
+        if self._fh is None:
+            self.dim = self.dim or vectors.shape[1]
+            self._fh = self.data_path.open("ab" if self.entries else "wb")
+        start = len(self.entries)
+        self._fh.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+        self.entries.extend([entry["path"], entry["mtime"], entry["size"]] for entry in entries)
+        return list(range(start, len(self.entries)))
+
+    def save(self) -> None:
+        if self._fh is None:
+            return
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+        temp = _temp_path(self.state_path)
+        with temp.open("w", encoding="utf-8") as fh:
+            json.dump({"model": self._model, "dim": self.dim, "entries": self.entries}, fh, ensure_ascii=False)
+        os.replace(temp, self.state_path)
+
+    def rows(self) -> Optional[np.ndarray]:
+        if not self.entries:
+            return None
+        if self._fh is not None:
+            self._fh.flush()
+        return np.memmap(self.data_path, dtype=np.float32, mode="r", shape=(len(self.entries), self.dim))
+
+    def discard(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+        for path in (self.data_path, self.state_path):
+            if path.exists():
+                path.unlink()
+
+
+def _is_unchanged(old: dict, current: dict, image_path: Path, use_hash: bool) -> bool:
+    if old.get("size") != current["size"]:
+        return False
+    if old.get("mtime") == current["mtime"]:
+        if old.get("sha1"):
+            current["sha1"] = old["sha1"]
+        elif use_hash:
+            # --hash sonradan açıldıysa yeniden kullanılan satırlar da özet kazanır;
+            # aksi halde içerik karşılaştırması bu satırlara hiç uygulanamaz.
+            current["sha1"] = content_hash(image_path)
+        return True
+    # Boyut aynı ama mtime farklı (kopyalama/touch): içerik özeti karar verir.
+    if use_hash and old.get("sha1"):
+        current["sha1"] = content_hash(image_path)
+        return current["sha1"] == old["sha1"]
+    return False
 
 
 def main() -> None:
@@ -45,40 +458,301 @@ def main() -> None:
     parser.add_argument("--variant-root", type=Path, help="Varyant klasörü")
     parser.add_argument("--embed-output", type=Path, default=Path("clip_embeddings.npy"))
     parser.add_argument("--meta-output", type=Path, default=Path("clip_metadata.json"))
+    parser.add_argument(
+        "--meta-npz-output", type=Path, help="Sütunlu metadata dosyası (varsayılan: <meta-output>.npz)"
+    )
+    parser.add_argument(
+        "--meta-format",
+        choices=("json", "npz", "both"),
+        default="both",
+        help="Yazılacak metadata biçimi; servis varsa .npz dosyasını tercih eder",
+    )
     parser.add_argument("--model", default=DEFAULT_MODEL)
     parser.add_argument("--pretrained", default=DEFAULT_PRETRAINED)
     parser.add_argument("--device", default=DEFAULT_DEVICE)
+    parser.add_argument(
+        "--backend", choices=BACKENDS, default=DEFAULT_BACKEND, help="Görsel encoder çalışma zamanı (CLIP_BACKEND)"
+    )
+    parser.add_argument("--encoder-path", type=Path, help="Dışa aktarılmış encoder (varsayılan: CLIP_ENCODER_PATH)")
+    parser.add_argument(
+        "--threads", type=int, default=DEFAULT_THREADS, help="Çıkarım thread sayısı (0: varsayılan)"
+    )
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Model batch boyutu")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Decode/ön işlem işçi sayısı")
+    parser.add_argument(
+        "--scan-workers", type=int, default=DEFAULT_SCAN_WORKERS, help="Klasör taramasında paralel thread sayısı"
+    )
+    parser.add_argument(
+        "--scan-cache",
+        type=Path,
+        help="Klasör mtime'ına göre dizin listesi önbelleği (JSON); yerinde değişen dosyaları fark etmez",
+    )
+    parser.add_argument(
+        "--checkpoint-every", type=int, default=10, help="Kaç batch'te bir kontrol noktası yazılacağı"
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Mevcut index'i okuyup yalnızca yeni/değişen görselleri vektörler",
+    )
+    parser.add_argument(
+        "--hash",
+        action="store_true",
+        help="Dosya içerik özeti (SHA-1) kaydeder; mtime değişse de içerik aynıysa yeniden vektörlemez",
+    )
+    parser.add_argument(
+        "--ivf-lists",
+        type=int,
+        default=0,
+        help="Yaklaşık arama (IVF) için küme sayısı; 0 ise IVF index oluşturulmaz",
+    )
+    parser.add_argument("--ivf-output", type=Path, help="IVF index dosyası (varsayılan: <embed-output>.ivf.npz)")
+    parser.add_argument(
+        "--quantize",
+        choices=("none", "float16", "int8"),
+        default="none",
+        help="float32 matrisin yanına kompakt skorlama kopyası yazar",
+    )
+    parser.add_argument(
+        "--neighbors",
+        type=int,
+        default=0,
+        help="Her görsel için önceden hesaplanacak komşu sayısı (/similar); 0 ise hesaplanmaz",
+    )
+    parser.add_argument(
+        "--neighbors-output", type=Path, help="Komşu tablosu (varsayılan: <embed-output>.neighbors.npz)"
+    )
     args = parser.parse_args()
 
-    model, preprocess = load_model(args.model, args.pretrained, args.device)
-    embeddings: List[np.ndarray] = []
-    metadata: List[dict] = []
-
+    build_id = uuid.uuid4().hex
     roots = [args.desen_root]
     if args.variant_root:
         roots.append(args.variant_root)
+    meta_npz_output = args.meta_npz_output or args.meta_output.with_suffix(".npz")
+
+    previous_embeddings: Optional[np.ndarray] = None
+    previous_rows: Dict[str, int] = {}
+    previous_meta: List[dict] = []
+    if args.incremental:
+        previous_embeddings, previous_meta = load_existing_index(
+            args.embed_output, args.meta_output, meta_npz_output
+        )
+        previous_rows = {entry["path"]: row for row, entry in enumerate(previous_meta)}
 
-    for root in roots:
-        for image_path in iter_images(root):
-            vector = encode_image(model, preprocess, args.device, image_path)
-            embeddings.append(vector)
+    metadata: List[dict] = []
+    root_ids: List[int] = []
+    # Her satırın vektör kaynağı: ("previous", satır), ("partial", satır) ya da
+    # henüz vektörlenmemişse/okunamadıysa None.
+    sources: List[Optional[Tuple[str, int]]] = []
+    to_encode: List[int] = []
+    scan_cache = ScanCache(args.scan_cache) if args.scan_cache else None
+    for root_id, root in enumerate(roots):
+        try:
+            images, failed_folders = scan_images(root, args.scan_workers, scan_cache)
+        except OSError as exc:
+            raise SystemExit(f"Kök klasöre erişilemiyor, index yayınlanmadı: {root} ({exc})")
+        for image_path, mtime, size in images:
             rel = image_path.relative_to(root)
-            metadata.append(
-                {
-                    "path": str(image_path),
-                    "folder": rel.parts[0] if len(rel.parts) > 1 else root.name,
-                    "fileName": image_path.name,
-                }
-            )
-
-    if not embeddings:
+            entry = {
+                "path": str(image_path),
+                "folder": rel.parts[0] if len(rel.parts) > 1 else root.name,
+                "fileName": image_path.name,
+                "root": ROOT_KINDS[root_id],
+                "mtime": mtime,
+                "size": size,
+            }
+            row = previous_rows.get(entry["path"])
+            if row is not None and _is_unchanged(previous_meta[row], entry, image_path, args.hash):
+                sources.append(("previous", row))
+            else:
+                if args.hash and "sha1" not in entry:
+                    entry["sha1"] = content_hash(image_path)
+                sources.append(None)
+                to_encode.append(len(metadata))
+            metadata.append(entry)
+            root_ids.append(root_id)
+        for folder in failed_folders:
+            # Listelenemeyen klasörün satırları silinmiş sayılmaz; önceki index'teki
+            # satırları olduğu gibi korunur ve sonraki çalıştırmada yeniden taranır.
+            if previous_embeddings is None:
+                raise SystemExit(f"Klasör listelenemedi, index yayınlanmadı: {folder}")
+            prefix = str(folder) + os.sep
+            reused = [row for path, row in previous_rows.items() if path.startswith(prefix)]
+            print(f"Önceki satırlar korunuyor: {folder} ({len(reused)} görsel)")
+            for row in reused:
+                metadata.append(dict(previous_meta[row], root=ROOT_KINDS[root_id]))
+                sources.append(("previous", row))
+                root_ids.append(root_id)
+    if scan_cache is not None:
+        scan_cache.save()
+
+    if args.incremental:
+        removed = len(set(previous_rows) - {entry["path"] for entry in metadata})
+        print(
+            f"Yeniden kullanılan: {len(metadata) - len(to_encode)}, "
+            f"vektörlenecek: {len(to_encode)}, silinen: {removed}"
+        )
+
+    checkpoint = BuildCheckpoint(args.embed_output, args.model, args.pretrained)
+    resumed = checkpoint.load()
+    pending: List[int] = []
+    for position in to_encode:
+        entry = metadata[position]
+        row = resumed.get((entry["path"], entry["mtime"], entry["size"]))
+        if row is not None:
+            sources[position] = ("partial", row)
+        else:
+            pending.append(position)
+    if resumed:
+        print(f"Kontrol noktasından devam ediliyor: {len(to_encode) - len(pending)} görsel hazır")
+
+    if pending:
+        encoder, preprocess = load_vision_encoder(
+            args.backend, args.model, args.pretrained, args.device, args.encoder_path, args.threads
+        )
+        paths = [Path(metadata[position]["path"]) for position in pending]
+        done = 0
+        try:
+            for batch_number, (indices, batch_vectors, failed) in enumerate(
+                encode_batches(encoder, preprocess, paths, args.batch_size, args.workers), start=1
+            ):
+                for index in failed:
+                    print(f"Okunamadı, atlandı: {paths[index]}")
+                if failed and not all(root.exists() for root in roots):
+                    raise SystemExit(
+                        "Kök klasöre erişilemiyor; kontrol noktası kaydedildi, "
+                        "yeniden çalıştırıldığında kaldığı yerden devam eder"
+                    )
+                if indices:
+                    rows = checkpoint.append([metadata[pending[index]] for index in indices], batch_vectors)
+                    for index, row in zip(indices, rows):
+                        sources[pending[index]] = ("partial", row)
+                if batch_number % max(1, args.checkpoint_every) == 0:
+                    checkpoint.save()
+                done += len(indices) + len(failed)
+                print(f"İşlendi: {done}/{len(paths)}", end="\r", flush=True)
+        finally:
+            checkpoint.save()
+        print()
+
+    kept = [position for position, source in enumerate(sources) if source is not None]
+    if not kept:
         raise SystemExit("Görsel bulunamadı, index oluşturulamadı")
+    partial_rows = checkpoint.rows()
+    is_previous = np.array([sources[position][0] == "previous" for position in kept])
+    source_rows = np.array([sources[position][1] for position in kept], dtype=np.int64)
+    dims = set()
+    if is_previous.any():
+        dims.add(previous_embeddings.shape[1])
+    if not is_previous.all():
+        dims.add(partial_rows.shape[1])
+    if len(dims) != 1:
+        raise SystemExit("Mevcut index farklı bir modelle oluşturulmuş, --incremental olmadan çalıştırın")
+
+    metadata = [metadata[position] for position in kept]
+    root_ids = [root_ids[position] for position in kept]
+    # Son matris doğrudan diskte, blok blok kurulur. Servis dosyayı mmap ile
+    # açtığından float32 ve C-sıralı yazılır ki yüklemede dönüşüm gerekmesin.
+    # Her derleme kendi adıyla yazılır; servisin eşlediği önceki matrise dokunulmaz.
+    previous_build = published_embeddings(args.embed_output)[1]
+    embed_path = build_embed_path(args.embed_output, build_id)
+    embed_temp = _temp_path(embed_path)
+    stack = np.lib.format.open_memmap(embed_temp, mode="w+", dtype=np.float32, shape=(len(kept), dims.pop()))
+    for start in range(0, len(kept), 8192):
+        previous_mask = is_previous[start:start + 8192]
+        rows = source_rows[start:start + 8192]
+        block = np.empty((rows.shape[0], stack.shape[1]), dtype=np.float32)
+        if previous_mask.any():
+            block[previous_mask] = previous_embeddings[rows[previous_mask]]
+        if not previous_mask.all():
+            block[~previous_mask] = partial_rows[rows[~previous_mask]]
+        stack[start:start + rows.shape[0]] = block
+    stack.flush()
+    del stack, partial_rows, previous_embeddings
+    os.replace(embed_temp, embed_path)
+    written = [embed_path]
+
+    # Kuantize kopyalar matrisle aynı derleme adını taşır ve manifest'ten önce yazılır.
+    stack = np.load(embed_path, mmap_mode="r")
+    if args.quantize == "float16":
+        (f16_path,) = quantized_paths(embed_path)["float16"]
+        publish_npy(f16_path, stack.astype(np.float16))
+        written.append(f16_path)
+    elif args.quantize == "int8":
+        codes_path, scales_path = quantized_paths(embed_path)["int8"]
+        codes, scales = quantize_int8(stack)
+        publish_npy(codes_path, codes)
+        publish_npy(scales_path, scales)
+        written.extend([codes_path, scales_path])
+
+    if args.meta_format in ("json", "both"):
+        meta_temp = _temp_path(args.meta_output)
+        with meta_temp.open("w", encoding="utf-8") as fh:
+            json.dump({"build_id": build_id, "items": metadata}, fh, ensure_ascii=False, indent=2)
+        os.replace(meta_temp, args.meta_output)
+        written.append(args.meta_output)
+    if args.meta_format in ("npz", "both"):
+        meta_temp = _temp_path(meta_npz_output)
+        save_columnar_metadata(meta_temp, metadata, roots, root_ids, build_id)
+        os.replace(meta_temp, meta_npz_output)
+        written.append(meta_npz_output)
+    elif meta_npz_output.exists():
+        # Servis .npz dosyasını tercih eder; eski sütunlu metadata yeni satırlarla eşleşmez.
+        meta_npz_output.unlink()
+
+    # IVF ve komşu tablosu sabit adlıdır ve derleme kimliğini taşır; manifest'ten
+    # önce yazılır ki yayınlanan derlemenin yanında her zaman kendi tabloları olsun.
+    ivf_output = args.ivf_output or args.embed_output.with_suffix(".ivf.npz")
+    if args.ivf_lists > 0:
+        centroids, order, offsets = train_ivf(stack, args.ivf_lists)
+        publish_npz(
+            ivf_output,
+            centroids=centroids,
+            order=order,
+            offsets=offsets,
+            n_rows=stack.shape[0],
+            build_id=np.array(build_id),
+        )
+        print(f"IVF index kaydedildi: {centroids.shape[0]} liste, {ivf_output}")
+    elif ivf_output.exists():
+        # Eski IVF dosyası yeni satırlarla eşleşmez; servisin yanlış index okumasını önle.
+        ivf_output.unlink()
+        print(f"Eski IVF index silindi: {ivf_output}")
+
+    neighbors_output = args.neighbors_output or args.embed_output.with_suffix(".neighbors.npz")
+    if args.neighbors > 0 and stack.shape[0] > 1:
+        indices, scores = compute_neighbors(stack, args.neighbors)
+        publish_npz(
+            neighbors_output,
+            indices=indices,
+            scores=scores,
+            n_rows=stack.shape[0],
+            build_id=np.array(build_id),
+        )
+        print(f"Komşu tablosu kaydedildi: {indices.shape[1]} komşu, {neighbors_output}")
+    elif neighbors_output.exists():
+        neighbors_output.unlink()
+        print(f"Eski komşu tablosu silindi: {neighbors_output}")
+
+    write_manifest(args.embed_output, build_id, embed_path, stack.shape)
+    written.append(manifest_path(args.embed_output))
+    checkpoint.discard()
+    print(f"Kaydedildi: {len(metadata)} görsel, {', '.join(str(path) for path in written)}")
 
-    stack = np.stack(embeddings).astype("float32")
-    np.save(args.embed_output, stack)
-    with args.meta_output.open("w", encoding="utf-8") as fh:
-        json.dump(metadata, fh, ensure_ascii=False, indent=2)
-    print(f"Kaydedildi: {len(metadata)} görsel, {args.embed_output}, {args.meta_output}")
+    del stack
+    # Önceki derleme servis /reload edene kadar kullanımda olabilir; daha eskileri
+    # ve manifest öncesi sabit adlı çıktılar silinir. Silinemeyenler (Windows'ta
+    # hâlâ eşlenmiş olanlar) bir sonraki derlemede yeniden denenir.
+    stale = remove_stale_builds(args.embed_output, keep=(previous_build,))
+    legacy = [args.embed_output, *(path for paths in quantized_paths(args.embed_output).values() for path in paths)]
+    for path in legacy:
+        try:
+            path.unlink()
+        except OSError:
+            continue
+        stale.append(path)
+    if stale:
+        print(f"Eski derleme dosyaları silindi: {len(stale)}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,275 @@
+import abc
+import argparse
+import inspect
+import json
+import os
+import re
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import open_clip
+import torch
+from PIL import Image
+
+BACKENDS = ("torch", "onnx", "torchscript")
+EXPORT_SUFFIX = {"onnx": ".onnx", "torchscript": ".pt"}
+DEFAULT_MODEL = os.getenv("CLIP_MODEL", "ViT-B-32")
+DEFAULT_PRETRAINED = os.getenv("CLIP_PRETRAINED", "laion2b_s34b_b79k")
+DEFAULT_BACKEND = os.getenv("CLIP_BACKEND", "torch").lower()
+DEFAULT_ENCODER_DIR = Path(os.getenv("CLIP_ENCODER_DIR", "."))
+ONNX_OPSET = 17
+PARITY_MIN_COSINE = 0.999
+
+
+def default_encoder_path(model_name: str, pretrained: str, backend: str) -> Path:
+    """Dışa aktarılan görsel kulesinin varsayılan yolu; `CLIP_ENCODER_PATH` önceliklidir."""
+    override = os.getenv("CLIP_ENCODER_PATH")
+    if override:
+        return Path(override)
+    slug = re.sub(r"[^0-9A-Za-z]+", "-", f"{model_name}-{pretrained or 'random'}").strip("-")
+    return DEFAULT_ENCODER_DIR / f"clip_visual_{slug}{EXPORT_SUFFIX[backend]}"
+
+
+def _sidecar_path(path: Path) -> Path:
+    return path.with_name(path.name + ".json")
+
+
+def _build_preprocess(cfg: dict):
+    return open_clip.image_transform(
+        tuple(cfg["size"]),
+        is_train=False,
+        mean=tuple(cfg["mean"]),
+        std=tuple(cfg["std"]),
+        resize_mode=cfg.get("resize_mode"),
+        interpolation=cfg.get("interpolation"),
+        fill_color=cfg.get("fill_color", 0),
+    )
+
+
+class VisionEncoder(abc.ABC):
+    """Ön işlenmiş görsel tensörlerini normalize float32 vektörlere çevirir."""
+
+    backend = "torch"
+
+    def __init__(self, device: str) -> None:
+        self.device = device
+
+    @abc.abstractmethod
+    def encode(self, batch: torch.Tensor) -> np.ndarray:
+        ...
+
+
+class _TorchModuleEncoder(VisionEncoder):
+    """Çıkarımı bir torch modülüyle yapan arka uçların ortak normalizasyonu."""
+
+    @abc.abstractmethod
+    def _forward(self, batch: torch.Tensor) -> torch.Tensor:
+        ...
+
+    def encode(self, batch: torch.Tensor) -> np.ndarray:
+        with torch.no_grad():
+            feats = self._forward(batch.to(self.device, non_blocking=True))
+        feats = feats / feats.norm(dim=-1, keepdim=True)
+        return feats.cpu().numpy().astype("float32")
+
+
+class TorchEncoder(_TorchModuleEncoder):
+    def __init__(self, model: torch.nn.Module, device: str) -> None:
+        super().__init__(device)
+        self.model = model
+
+    def _forward(self, batch: torch.Tensor) -> torch.Tensor:
+        return self.model.encode_image(batch)
+
+
+class TorchScriptEncoder(_TorchModuleEncoder):
+    backend = "torchscript"
+
+    def __init__(self, path: Path, device: str) -> None:
+        super().__init__(device)
+        self._module = torch.jit.load(str(path), map_location=device)
+        self._module.eval()
+
+    def _forward(self, batch: torch.Tensor) -> torch.Tensor:
+        return self._module(batch)
+
+
+class OnnxEncoder(VisionEncoder):
+    backend = "onnx"
+
+    def __init__(self, path: Path, threads: int = 0) -> None:
+        try:
+            import onnxruntime as ort
+        except ImportError as exc:
+            raise RuntimeError("CLIP_BACKEND=onnx için onnxruntime paketi gerekli") from exc
+        options = ort.SessionOptions()
+        if threads > 0:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self._session = ort.InferenceSession(str(path), options, providers=["CPUExecutionProvider"])
+        self._input = self._session.get_inputs()[0].name
+        super().__init__("cpu")
+
+    def encode(self, batch: torch.Tensor) -> np.ndarray:
+        feats = self._session.run(None, {self._input: batch.cpu().numpy().astype("float32")})[0]
+        feats = feats / np.linalg.norm(feats, axis=-1, keepdims=True)
+        return feats.astype("float32")
+
+
+def load_torch_model(model_name: str, pretrained: str, device: str):
+    model, _, preprocess = open_clip.create_model_and_transforms(model_name, pretrained=pretrained)
+    model.eval()
+    model.to(device)
+    return model, preprocess
+
+
+def load_vision_encoder(
+    backend: str,
+    model_name: str,
+    pretrained: str,
+    device: str,
+    path: Optional[Path] = None,
+    threads: int = 0,
+) -> Tuple[VisionEncoder, object]:
+    """Seçilen arka uca göre (encoder, preprocess) döner.
+
+    onnx/torchscript arka uçları open_clip modelini hiç oluşturmaz; ön işlem
+    ayarları dışa aktarım sırasında yazılan yan JSON dosyasından okunur.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Bilinmeyen CLIP arka ucu: {backend} ({'|'.join(BACKENDS)})")
+    if threads > 0:
+        torch.set_num_threads(threads)
+    if backend == "torch":
+        model, preprocess = load_torch_model(model_name, pretrained, device)
+        return TorchEncoder(model, device), preprocess
+
+    path = path or default_encoder_path(model_name, pretrained, backend)
+    sidecar = _sidecar_path(path)
+    if not path.exists() or not sidecar.exists():
+        raise RuntimeError(f"Dışa aktarılmış encoder bulunamadı: {path} (önce `clip_backend.py export` çalıştırın)")
+    with sidecar.open("r", encoding="utf-8") as fh:
+        info = json.load(fh)
+    if info.get("model") != model_name or info.get("pretrained") != pretrained:
+        # Başka bir modelin vektörleri mevcut index ile karşılaştırılamaz.
+        raise RuntimeError(
+            f"Encoder {info.get('model')}/{info.get('pretrained')} için üretilmiş, "
+            f"beklenen {model_name}/{pretrained}"
+        )
+    if backend == "onnx":
+        encoder: VisionEncoder = OnnxEncoder(path, threads)
+    else:
+        encoder = TorchScriptEncoder(path, device)
+    return encoder, _build_preprocess(info["preprocess"])
+
+
+class _VisionTower(torch.nn.Module):
+    def __init__(self, model: torch.nn.Module) -> None:
+        super().__init__()
+        self.model = model
+
+    def forward(self, pixels: torch.Tensor) -> torch.Tensor:
+        return self.model.encode_image(pixels)
+
+
+def export_encoder(backend: str, model_name: str, pretrained: str, output: Path) -> Path:
+    """Görsel kulesini bir kez dışa aktarır ve ön işlem ayarlarını yanına yazar."""
+    if backend not in EXPORT_SUFFIX:
+        raise ValueError(f"Dışa aktarılabilen arka uçlar: {', '.join(EXPORT_SUFFIX)}")
+    model, _ = load_torch_model(model_name, pretrained, "cpu")
+    tower = _VisionTower(model).eval()
+    cfg = dict(model.visual.preprocess_cfg)
+    example = torch.zeros((2, 3, *cfg["size"]), dtype=torch.float32)
+    temp = output.with_name(f"{output.stem}.tmp{output.suffix}")
+    # torch 2.5+ varsayılan olarak dynamo dışa aktarıcısını dener; izlemeli
+    # (TorchScript tabanlı) dışa aktarım open_clip ile sorunsuz çalışır.
+    extra = {"dynamo": False} if "dynamo" in inspect.signature(torch.onnx.export).parameters else {}
+    with torch.no_grad():
+        if backend == "onnx":
+            torch.onnx.export(
+                tower,
+                (example,),
+                str(temp),
+                input_names=["pixels"],
+                output_names=["embedding"],
+                dynamic_axes={"pixels": {0: "batch"}, "embedding": {0: "batch"}},
+                opset_version=ONNX_OPSET,
+                **extra,
+            )
+        else:
+            torch.jit.save(torch.jit.trace(tower, example), str(temp))
+        dim = int(tower(example[:1]).shape[-1])
+    os.replace(temp, output)
+    info = {
+        "model": model_name,
+        "pretrained": pretrained,
+        "backend": backend,
+        "dim": dim,
+        "preprocess": {key: list(value) if isinstance(value, tuple) else value for key, value in cfg.items()},
+    }
+    with _sidecar_path(output).open("w", encoding="utf-8") as fh:
+        json.dump(info, fh, ensure_ascii=False, indent=2)
+    return output
+
+
+def _sample_images(paths: Sequence[Path], count: int) -> List[Image.Image]:
+    images = []
+    for path in paths[:count]:
+        try:
+            images.append(Image.open(path).convert("RGB"))
+        except Exception:
+            continue
+    rng = np.random.default_rng(0)
+    while len(images) < count:
+        # Görsel verilmezse sabit tohumlu gürültü görselleri kullanılır.
+        images.append(Image.fromarray(rng.integers(0, 256, (256, 256, 3), dtype=np.uint8)))
+    return images
+
+
+def check_parity(
+    backend: str,
+    model_name: str,
+    pretrained: str,
+    path: Optional[Path] = None,
+    image_paths: Sequence[Path] = (),
+    count: int = 8,
+    threads: int = 0,
+) -> float:
+    """Dışa aktarılan encoder ile eager PyTorch vektörleri arasındaki en düşük kosinüs benzerliği."""
+    reference, reference_preprocess = load_vision_encoder("torch", model_name, pretrained, "cpu")
+    candidate, candidate_preprocess = load_vision_encoder(backend, model_name, pretrained, "cpu", path, threads)
+    images = _sample_images(list(image_paths), count)
+    expected = reference.encode(torch.stack([reference_preprocess(image) for image in images]))
+    actual = candidate.encode(torch.stack([candidate_preprocess(image) for image in images]))
+    return float(np.min(np.sum(expected * actual, axis=1)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="CLIP görsel kulesini ONNX/TorchScript olarak dışa aktarır ve doğrular")
+    parser.add_argument("command", choices=["export", "check"])
+    parser.add_argument("--backend", choices=list(EXPORT_SUFFIX), default="onnx")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--pretrained", default=DEFAULT_PRETRAINED)
+    parser.add_argument("--output", type=Path, help="Encoder dosyası (varsayılan: CLIP_ENCODER_PATH veya model adından)")
+    parser.add_argument("--images", type=Path, nargs="*", default=[], help="Doğrulamada kullanılacak görseller")
+    parser.add_argument("--samples", type=int, default=8, help="Doğrulamada kullanılacak görsel sayısı")
+    parser.add_argument("--threads", type=int, default=0, help="Çıkarım thread sayısı (0: varsayılan)")
+    parser.add_argument("--min-cosine", type=float, default=PARITY_MIN_COSINE)
+    args = parser.parse_args()
+
+    output = args.output or default_encoder_path(args.model, args.pretrained, args.backend)
+    if args.command == "export":
+        export_encoder(args.backend, args.model, args.pretrained, output)
+        print(f"Dışa aktarıldı: {output}")
+    cosine = check_parity(
+        args.backend, args.model, args.pretrained, output, args.images, args.samples, args.threads
+    )
+    print(f"Eşleşme kontrolü: en düşük kosinüs benzerliği {cosine:.6f}")
+    if cosine < args.min_cosine:
+        raise SystemExit(f"Encoder çıktısı PyTorch ile eşleşmiyor (< {args.min_cosine})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,101 +1,918 @@
 import asyncio
-import base64
+import contextlib
+import functools
+import hashlib
+import heapq
 import io
 import json
 import os
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Sequence, Tuple, TypeVar
 
 import numpy as np
 import open_clip
 import torch
-from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi import FastAPI, File, HTTPException, Query, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from PIL import Image
 
+from clip_backend import BACKENDS, VisionEncoder, load_vision_encoder
+from clip_store import (
+    META_FORMAT_VERSION,
+    ROOT_KINDS,
+    load_embeddings,
+    make_token,
+    open_shard,
+    published_embeddings,
+    read_json_metadata,
+    remove_stale_builds,
+    search_shard,
+    select_top_k,
+)
+
 INDEX_EMBED_PATH = Path(os.getenv("CLIP_INDEX_PATH", "clip_embeddings.npy"))
 INDEX_META_PATH = Path(os.getenv("CLIP_METADATA_PATH", "clip_metadata.json"))
+INDEX_META_NPZ_PATH = Path(os.getenv("CLIP_METADATA_NPZ_PATH", str(INDEX_META_PATH.with_suffix(".npz"))))
 MODEL_NAME = os.getenv("CLIP_MODEL", "ViT-B-32")
 MODEL_PRETRAINED = os.getenv("CLIP_PRETRAINED", "laion2b_s34b_b79k")
+ENCODER_BACKEND = os.getenv("CLIP_BACKEND", "torch").lower()
+ENCODER_PATH = Path(os.environ["CLIP_ENCODER_PATH"]) if os.getenv("CLIP_ENCODER_PATH") else None
 BATCH_SIZE = int(os.getenv("CLIP_BATCH", "32"))
 TOP_K_DEFAULT = int(os.getenv("CLIP_TOP_K", "8"))
+INDEX_BACKEND = os.getenv("CLIP_INDEX_BACKEND", "exact").lower()
+INDEX_IVF_PATH = Path(os.getenv("CLIP_IVF_PATH", str(INDEX_EMBED_PATH.with_suffix(".ivf.npz"))))
+IVF_NPROBE = int(os.getenv("CLIP_IVF_NPROBE", "8"))
+USE_MMAP = os.getenv("CLIP_MMAP", "1") != "0"
+QUANTIZED = os.getenv("CLIP_QUANTIZED", "none").lower()
+RERANK_CANDIDATES = int(os.getenv("CLIP_RERANK", "200"))
+SHARDS = int(os.getenv("CLIP_SHARDS", "0"))
+INDEX_NEIGHBORS_PATH = Path(
+    os.getenv("CLIP_NEIGHBORS_PATH", str(INDEX_EMBED_PATH.with_suffix(".neighbors.npz")))
+)
+TAGS_PATH = Path(os.getenv("CLIP_TAGS_PATH", str(Path(__file__).with_name("tags_data.json"))))
+APPSETTINGS_PATH = Path(__file__).with_name("appsettings.json")
+INFERENCE_WORKERS = max(1, int(os.getenv("CLIP_INFERENCE_WORKERS", "2")))
+INFERENCE_QUEUE = max(0, int(os.getenv("CLIP_INFERENCE_QUEUE", "16")))
+BATCH_WAIT_MS = float(os.getenv("CLIP_BATCH_WAIT_MS", "5"))
+CACHE_SIZE = int(os.getenv("CLIP_CACHE_SIZE", "256"))
+CACHE_TTL = float(os.getenv("CLIP_CACHE_TTL", "3600"))
+CACHE_RESULTS = os.getenv("CLIP_CACHE_RESULTS", "1") != "0"
+TORCH_THREADS = int(os.getenv("CLIP_TORCH_THREADS", "0"))
+ONNX_THREADS = int(os.getenv("CLIP_ONNX_THREADS", str(TORCH_THREADS)))
 DEVICE = os.getenv("CLIP_DEVICE", "cuda" if torch.cuda.is_available() else "cpu")
 
+if TORCH_THREADS > 0:
+    torch.set_num_threads(TORCH_THREADS)
+if ENCODER_BACKEND not in BACKENDS:
+    raise RuntimeError(f"CLIP_BACKEND {'|'.join(BACKENDS)} olmalı: {ENCODER_BACKEND}")
+
+T = TypeVar("T")
+
+
+class InferenceBusyError(RuntimeError):
+    pass
+
+
+class LruCache:
+    """Boyut ve yaşam süresi (TTL) sınırlı LRU önbellek; isabet/ıska sayar."""
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self._max_size = max_size
+        self._ttl = ttl
+        self._items: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        item = self._items.get(key)
+        if item is None or (self._ttl > 0 and time.monotonic() - item[0] > self._ttl):
+            if item is not None:
+                del self._items[key]
+            self.misses += 1
+            return None
+        self._items.move_to_end(key)
+        self.hits += 1
+        return item[1]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self._max_size <= 0:
+            return
+        self._items[key] = (time.monotonic(), value)
+        self._items.move_to_end(key)
+        while len(self._items) > self._max_size:
+            self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        self._items.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._items), "hits": self.hits, "misses": self.misses}
+
+
+class ExactIndex:
+    """Tüm embedding matrisi üzerinde kaba kuvvet iç çarpım araması."""
+
+    def __init__(self, embeddings: np.ndarray) -> None:
+        self._embeddings = embeddings
+
+    def search(self, vector: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        return select_top_k(self._embeddings @ vector, top_k)
+
+    def search_batch(self, matrix: np.ndarray, top_k: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        # Tüm sorgular tek bir matris-matris çarpımıyla skorlanır.
+        scores = matrix @ self._embeddings.T
+        return [select_top_k(row, top_k) for row in scores]
+
+
+class ShardedIndex:
+    """Embedding matrisini satır aralıklarına bölüp ayrı süreçlerde skorlar.
+
+    Her shard kendi yerel top-k listesini döner, koordinatör bunları bir heap
+    ile birleştirir. Böylece skorlama tüm çekirdeklere yayılır. Süreç havuzu
+    snapshot'a aittir ve snapshot yüklenirken başlatılır; snapshot değiştirilince
+    kapatılır ve işçilerin eski derlemeye ait eşlemeleri süreçlerle birlikte bırakılır.
+    """
+
+    def __init__(self, embed_path: Path, embeddings: np.ndarray, shards: int) -> None:
+        stat = embed_path.stat()
+        self._path = str(embed_path)
+        self._stamp = (stat.st_mtime_ns, stat.st_size)
+        self._embeddings = embeddings
+        bounds = np.linspace(0, embeddings.shape[0], shards + 1).astype(int)
+        self._ranges = [(int(start), int(end)) for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+        # torch/OpenMP thread'leri olan bir süreçten fork güvenli değil; spawn kullanılır.
+        self._pool = ProcessPoolExecutor(
+            max_workers=len(self._ranges), mp_context=multiprocessing.get_context("spawn")
+        )
+        # İşçiler burada başlatılıp matrisi açar; /readyz hazır dediğinde ilk
+        # arama süreç başlatma maliyetini ödemez.
+        try:
+            futures = [self._pool.submit(open_shard, self._path, self._stamp, USE_MMAP) for _ in self._ranges]
+            for future in futures:
+                future.result()
+        except Exception:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    def close(self) -> None:
+        # Süren aramalar tamamlanır, ardından işçi süreçleri sonlanır.
+        self._pool.shutdown(wait=False)
+
+    def search(self, vector: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        return self.search_batch(vector[None, :], top_k)[0]
+
+    def search_batch(self, matrix: np.ndarray, top_k: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        try:
+            futures = [
+                self._pool.submit(search_shard, self._path, self._stamp, USE_MMAP, start, end, matrix, top_k)
+                for start, end in self._ranges
+            ]
+        except RuntimeError:
+            # Snapshot /reload ile devreden çıkarken başlamış bir arama (ya da
+            # bozulmuş havuz); ana süreçte zaten açık olan matrisle yanıtlanır.
+            return ExactIndex(self._embeddings).search_batch(matrix, top_k)
+        try:
+            per_shard = [future.result() for future in futures]
+        except BrokenProcessPool:
+            # Bir işçi süreci beklenmedik şekilde sonlandı; havuz artık kullanılamaz.
+            print("Shard işçi havuzu bozuldu, tam aramaya dönülüyor")
+            return ExactIndex(self._embeddings).search_batch(matrix, top_k)
+        merged = []
+        for query in range(matrix.shape[0]):
+            best = heapq.nlargest(
+                top_k,
+                ((float(score), int(row)) for shard in per_shard for row, score in zip(*shard[query])),
+            )
+            merged.append(
+                (
+                    np.array([row for _, row in best], dtype=np.int64),
+                    np.array([score for score, _ in best], dtype=np.float32),
+                )
+            )
+        return merged
+
+
+class QuantizedIndex:
+    """Kompakt (float16 ya da satır ölçekli int8) kopya üzerinde skorlama.
+
+    Tüm satırlar kompakt matrisle skorlanır, en iyi `rerank` aday float32
+    matristen okunup yeniden sıralanır. float32 dosya mmap ile açıldığından
+    yalnızca aday satırların sayfaları belleğe gelir.
+    """
+
+    CHUNK_ROWS = 65536
+
+    def __init__(
+        self,
+        embeddings: np.ndarray,
+        codes: np.ndarray,
+        scales: Optional[np.ndarray],
+        rerank: int,
+    ) -> None:
+        self._embeddings = embeddings
+        self._codes = codes
+        self._scales = scales
+        self._rerank = max(1, rerank)
+
+    @classmethod
+    def load(cls, kind: str, embed_path: Path, embeddings: np.ndarray, rerank: int) -> Optional["QuantizedIndex"]:
+        mmap_mode = "r" if USE_MMAP else None
+        if kind == "float16":
+            codes_path = embed_path.with_suffix(".f16.npy")
+            if not codes_path.exists():
+                return None
+            codes, scales = np.load(codes_path, mmap_mode=mmap_mode), None
+        elif kind == "int8":
+            codes_path = embed_path.with_suffix(".i8.npy")
+            scales_path = embed_path.with_suffix(".i8-scale.npy")
+            if not codes_path.exists() or not scales_path.exists():
+                return None
+            codes = np.load(codes_path, mmap_mode=mmap_mode)
+            scales = np.load(scales_path).astype(np.float32)
+        else:
+            raise RuntimeError(f"Bilinmeyen CLIP_QUANTIZED değeri: {kind}")
+        if codes.shape != embeddings.shape:
+            raise RuntimeError("Kuantize embedding dosyası index ile eşleşmiyor, index'i yeniden oluşturun")
+        return cls(embeddings, codes, scales, rerank)
+
+    def _coarse_scores(self, matrix: np.ndarray) -> np.ndarray:
+        # Blok blok float32'ye açılır; bellek trafiği kompakt matrisin boyutu kadardır.
+        parts = []
+        for start in range(0, self._codes.shape[0], self.CHUNK_ROWS):
+            block = self._codes[start:start + self.CHUNK_ROWS].astype(np.float32) @ matrix.T
+            if self._scales is not None:
+                block *= self._scales[start:start + self.CHUNK_ROWS, None]
+            parts.append(block)
+        return np.concatenate(parts).T
+
+    def _rerank_rows(self, coarse: np.ndarray, vector: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        candidates, _ = select_top_k(coarse, max(top_k, self._rerank))
+        candidates = np.sort(candidates)
+        idx, scores = select_top_k(self._embeddings[candidates] @ vector, top_k)
+        return candidates[idx], scores
+
+    def search(self, vector: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        return self._rerank_rows(self._coarse_scores(vector[None, :])[0], vector, top_k)
+
+    def search_batch(self, matrix: np.ndarray, top_k: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        coarse = self._coarse_scores(matrix)
+        return [self._rerank_rows(row, vector, top_k) for row, vector in zip(coarse, matrix)]
+
+
+class IvfIndex:
+    """build_clip_index.py --ivf-lists ile üretilen IVF index üzerinde yaklaşık arama.
+
+    Sorgu önce küme merkezleriyle karşılaştırılır, en yakın `nprobe` listedeki
+    satırlar tam skorlanır. `nprobe` büyüdükçe recall artar, gecikme uzar.
+    """
+
+    def __init__(
+        self,
+        embeddings: np.ndarray,
+        centroids: np.ndarray,
+        order: np.ndarray,
+        offsets: np.ndarray,
+        nprobe: int,
+    ) -> None:
+        self._embeddings = embeddings
+        self._centroids = centroids
+        self._order = order
+        self._offsets = offsets
+        self._nprobe = max(1, min(nprobe, centroids.shape[0]))
+
+    @classmethod
+    def load(cls, path: Path, embeddings: np.ndarray, nprobe: int, build_id: Optional[str] = None) -> "IvfIndex":
+        with np.load(path) as data:
+            stale = build_id is not None and ("build_id" not in data.files or str(data["build_id"]) != build_id)
+            if int(data["n_rows"]) != embeddings.shape[0] or stale:
+                # Aynı boyutlu başka bir derlemenin listeleri yanlış satırları gösterir.
+                raise RuntimeError("IVF index embedding dosyasıyla eşleşmiyor, index'i yeniden oluşturun")
+            return cls(
+                embeddings,
+                data["centroids"].astype("float32"),
+                data["order"],
+                data["offsets"],
+                nprobe,
+            )
+
+    def search(self, vector: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        coarse = self._centroids @ vector
+        lists = np.argpartition(-coarse, self._nprobe - 1)[: self._nprobe]
+        rows = np.concatenate([self._order[self._offsets[c]:self._offsets[c + 1]] for c in lists])
+        if rows.size == 0:
+            return rows, np.empty(0, dtype="float32")
+        idx, scores = select_top_k(self._embeddings[rows] @ vector, top_k)
+        return rows[idx], scores
+
+    def search_batch(self, matrix: np.ndarray, top_k: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        # Her sorgunun aday listeleri farklı olduğundan sorgular ayrı taranır.
+        return [self.search(vector, top_k) for vector in matrix]
+
+
+class ColumnarMeta:
+    """build_clip_index.py'nin yazdığı sütunlu metadata (.npz) üzerinde okuyucu.
+
+    Satırlar sözlük olarak saklanmaz; `meta[i]` istendiğinde string
+    tablolarından ve paketlenmiş ad dizisinden kurulur.
+    """
+
+    def __init__(self, path: Path) -> None:
+        with np.load(path) as data:
+            if int(data["version"]) != META_FORMAT_VERSION:
+                raise RuntimeError(f"Desteklenmeyen metadata sürümü: {int(data['version'])}")
+            self.roots: List[str] = data["roots"].tolist()
+            self.dirs: List[str] = data["dirs"].tolist()
+            self.folders: List[str] = data["folders"].tolist()
+            self.build_id: Optional[str] = str(data["build_id"]) if "build_id" in data.files else None
+            self.root_kinds: List[str] = (
+                data["root_kinds"].tolist() if "root_kinds" in data.files else list(ROOT_KINDS[: len(self.roots)])
+            )
+            self.root_id = data["root_id"]
+            self.dir_id = data["dir_id"]
+            self.folder_id = data["folder_id"]
+            self._names = data["names"].tobytes()
+            self._offsets = data["name_offsets"]
+
+    def __len__(self) -> int:
+        return self.folder_id.shape[0]
+
+    def file_name(self, row: int) -> str:
+        return self._names[self._offsets[row]:self._offsets[row + 1]].decode("utf-8")
+
+    def __getitem__(self, row: int) -> dict:
+        name = self.file_name(row)
+        return {
+            "path": self.roots[self.root_id[row]] + self.dirs[self.dir_id[row]] + name,
+            "folder": self.folders[self.folder_id[row]],
+            "fileName": name,
+        }
+
+
+def _intern_column(values: Sequence[str]) -> Tuple[np.ndarray, List[str]]:
+    table: Dict[str, int] = {}
+    ids = np.fromiter((table.setdefault(value, len(table)) for value in values), dtype=np.int32, count=len(values))
+    return ids, list(table)
+
+
+class RowGroups:
+    """Bir sütunun değerlerine göre önceden gruplanmış satır indeksleri.
+
+    Satırlar değere göre bir kez sıralanır; her değer için satırlar
+    `order[offsets[i]:offsets[i + 1]]` aralığıdır ve artan sıradadır.
+    """
+
+    def __init__(self, ids: np.ndarray, names: List[str]) -> None:
+        order = np.argsort(ids, kind="stable")
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(ids, minlength=len(names)))])
+        self._groups: Dict[str, List[np.ndarray]] = {}
+        for i, name in enumerate(names):
+            self._groups.setdefault(name.casefold(), []).append(order[offsets[i]:offsets[i + 1]])
+
+    def rows(self, names: Sequence[str]) -> np.ndarray:
+        parts = [part for name in names for part in self._groups.get(name.casefold(), [])]
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        return parts[0] if len(parts) == 1 else np.unique(np.concatenate(parts))
+
+
+@dataclass(frozen=True)
+class SearchFilter:
+    folders: Tuple[str, ...] = ()
+    roots: Tuple[str, ...] = ()
+    tags: Tuple[str, ...] = ()
+
+    def __bool__(self) -> bool:
+        return bool(self.folders or self.roots or self.tags)
+
+
+def _tags_mtime() -> int:
+    try:
+        return TAGS_PATH.stat().st_mtime_ns
+    except OSError:
+        return 0
+
+
+def _read_tagged_tokens() -> Dict[str, List[str]]:
+    if not TAGS_PATH.exists():
+        return {}
+    try:
+        data = json.loads(TAGS_PATH.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+    tagged = data.get("taggedDesigns") if isinstance(data, dict) else None
+    if not isinstance(tagged, dict):
+        return {}
+    tokens: Dict[str, List[str]] = {}
+    for tag, items in tagged.items():
+        if isinstance(items, list):
+            tokens.setdefault(tag.casefold(), []).extend(
+                item["token"] for item in items if isinstance(item, dict) and isinstance(item.get("token"), str)
+            )
+    return tokens
+
+
+def _configured_roots() -> Dict[str, str]:
+    """Kök türü -> klasör; CLIP_DESEN_ROOT/CLIP_VARIANT_ROOT, yoksa appsettings.json."""
+    roots = {"desen": os.getenv("CLIP_DESEN_ROOT", ""), "varyant": os.getenv("CLIP_VARIANT_ROOT", "")}
+    if not all(roots.values()) and APPSETTINGS_PATH.exists():
+        try:
+            settings = json.loads(APPSETTINGS_PATH.read_text(encoding="utf-8-sig"))
+        except Exception:
+            settings = {}
+        roots["desen"] = roots["desen"] or settings.get("DesenKlasoru") or ""
+        roots["varyant"] = roots["varyant"] or settings.get("VaryantKlasoru") or ""
+    return {kind: path for kind, path in roots.items() if path}
+
+
+def _root_kinds_from_paths(paths: Sequence[str]) -> List[str]:
+    # `root` alanı olmayan eski JSON metadata için kök türü yol önekinden
+    # çıkarılır; hiçbir köke uymayan satırlar boş kalır.
+    prefixes = [
+        (root.replace("/", "\\").rstrip("\\").casefold() + "\\", kind) for kind, root in _configured_roots().items()
+    ]
+    prefixes.sort(key=lambda item: -len(item[0]))
+    kinds = []
+    for path in paths:
+        path = path.replace("/", "\\").casefold()
+        kinds.append(next((kind for prefix, kind in prefixes if path.startswith(prefix)), ""))
+    return kinds
+
+
+def _load_meta() -> Tuple[object, Optional[str]]:
+    """Metadata'yı ve yazan derlemenin kimliğini döner."""
+    if INDEX_META_NPZ_PATH.exists():
+        meta = ColumnarMeta(INDEX_META_NPZ_PATH)
+        return meta, meta.build_id
+    return read_json_metadata(INDEX_META_PATH)
+
+
+@dataclass(frozen=True)
+class IndexSnapshot:
+    """Birlikte yüklenen embedding, metadata ve arama index'i; değiştirilmez."""
+
+    embeddings: np.ndarray
+    meta: object
+    index: object
+    # (indices, scores): build_clip_index.py --neighbors ile üretilen komşu tablosu.
+    neighbors: Optional[Tuple[np.ndarray, np.ndarray]] = None
+    # Manifest'teki derleme kimliği; sabit adlı eski index'lerde None.
+    build_id: Optional[str] = None
+    # Filtre grupları gibi türetilmiş yapılar ilk kullanımda hesaplanıp burada tutulur.
+    _derived: dict = field(default_factory=dict, compare=False, repr=False)
+
+    @property
+    def count(self) -> int:
+        return len(self.meta)
 
-def _make_token(path: str) -> str:
-    return base64.b64encode(path.encode("utf-8")).decode("ascii")
+    def close(self) -> None:
+        """Snapshot devreden çıkınca index'in tuttuğu süreçleri bırakır."""
+        close = getattr(self.index, "close", None)
+        if close is not None:
+            close()
+
+    def _groups(self) -> Tuple[RowGroups, RowGroups]:
+        groups = self._derived.get("groups")
+        if groups is None:
+            if isinstance(self.meta, ColumnarMeta):
+                folder_ids, folders = self.meta.folder_id, self.meta.folders
+                root_ids, roots = self.meta.root_id, self.meta.root_kinds
+            else:
+                folder_ids, folders = _intern_column([entry.get("folder") or "" for entry in self.meta])
+                kinds = [entry.get("root") or "" for entry in self.meta]
+                if "" in kinds:
+                    inferred = _root_kinds_from_paths([entry["path"] for entry in self.meta])
+                    kinds = [kind or guess for kind, guess in zip(kinds, inferred)]
+                root_ids, roots = _intern_column(kinds)
+            groups = (RowGroups(folder_ids, folders), RowGroups(root_ids, roots))
+            self._derived["groups"] = groups
+            self._derived["roots_known"] = "" not in roots
+        return groups
+
+    def check_filter(self, filters: SearchFilter) -> None:
+        """Snapshot filtreyi karşılayamıyorsa ValueError fırlatır."""
+        if filters.roots:
+            self._groups()
+            if not self._derived["roots_known"]:
+                raise ValueError(
+                    "Metadata'da bazı görsellerin kök bilgisi yok; index'i yeniden oluşturun "
+                    "ya da CLIP_DESEN_ROOT/CLIP_VARIANT_ROOT ayarlayın"
+                )
+
+    def token_rows(self) -> Dict[str, int]:
+        rows = self._derived.get("tokens")
+        if rows is None:
+            rows = {}
+            for row in range(len(self.meta)):
+                entry = self.meta[row]
+                rows[entry.get("token") or make_token(entry["path"])] = row
+            self._derived["tokens"] = rows
+        return rows
+
+    def _tag_rows(self, tags: Sequence[str]) -> np.ndarray:
+        # tags_data.json yalnızca mtime değiştiğinde yeniden okunur. Satırlar
+        # etiket başına tutulur; dosya değişince önceki sürümün tümü atılır.
+        mtime = _tags_mtime()
+        cached = self._derived.get("tags")
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, _read_tagged_tokens(), {})
+            self._derived["tags"] = cached
+        _, tagged, by_tag = cached
+        parts = []
+        for tag in {tag.casefold() for tag in tags}:
+            if tag not in tagged:
+                continue
+            rows = by_tag.get(tag)
+            if rows is None:
+                token_rows = self.token_rows()
+                rows = np.array(sorted({token_rows[token] for token in tagged[tag] if token in token_rows}), dtype=np.int64)
+                by_tag[tag] = rows
+            parts.append(rows)
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        return parts[0] if len(parts) == 1 else np.unique(np.concatenate(parts))
+
+    def rows_for(self, filters: SearchFilter) -> np.ndarray:
+        """Filtreye uyan satır indekslerini artan sırada döner."""
+        folder_groups, root_groups = self._groups()
+        rows: Optional[np.ndarray] = None
+        for part in (
+            folder_groups.rows(filters.folders) if filters.folders else None,
+            root_groups.rows(filters.roots) if filters.roots else None,
+            self._tag_rows(filters.tags) if filters.tags else None,
+        ):
+            if part is not None:
+                rows = part if rows is None else np.intersect1d(rows, part, assume_unique=True)
+        return rows if rows is not None else np.arange(self.count)
+
+
+def load_snapshot() -> IndexSnapshot:
+    embed_path, build_id = published_embeddings(INDEX_EMBED_PATH)
+    if not embed_path.exists() or not (INDEX_META_NPZ_PATH.exists() or INDEX_META_PATH.exists()):
+        raise FileNotFoundError(
+            "Embedding veya metadata dosyası bulunamadı. build_clip_index.py çalıştırın."
+        )
+    embeddings = load_embeddings(embed_path, USE_MMAP)
+    meta, meta_build_id = _load_meta()
+    if embeddings.shape[0] != len(meta):
+        raise RuntimeError("Embedding ve metadata sayıları eşleşmiyor")
+    if build_id is not None and meta_build_id != build_id:
+        # Derleme metadata'yı yazmış, manifest'i henüz değiştirmemiş olabilir.
+        raise RuntimeError("Embedding ve metadata farklı derlemelere ait, derleme bitince tekrar deneyin")
+    index = None
+    if INDEX_BACKEND == "ivf":
+        if INDEX_IVF_PATH.exists():
+            index = IvfIndex.load(INDEX_IVF_PATH, embeddings, IVF_NPROBE, build_id)
+        else:
+            print(f"IVF index bulunamadı ({INDEX_IVF_PATH}), tam aramaya dönülüyor")
+    elif QUANTIZED != "none":
+        index = QuantizedIndex.load(QUANTIZED, embed_path, embeddings, RERANK_CANDIDATES)
+        if index is None:
+            print(f"{QUANTIZED} embedding kopyası bulunamadı, float32 skorlamaya dönülüyor")
+    elif SHARDS > 1:
+        index = ShardedIndex(embed_path, embeddings, SHARDS)
+    if index is None:
+        index = ExactIndex(embeddings)
+    return IndexSnapshot(
+        embeddings=embeddings,
+        meta=meta,
+        index=index,
+        neighbors=_load_neighbors(len(meta), meta_build_id),
+        build_id=build_id,
+    )
+
+
+def _load_neighbors(rows: int, build_id: Optional[str]) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    if not INDEX_NEIGHBORS_PATH.exists():
+        return None
+    with np.load(INDEX_NEIGHBORS_PATH) as data:
+        if int(data["n_rows"]) != rows or (build_id is not None and str(data["build_id"]) != build_id):
+            # Tablo başka bir derlemeye ait; /similar tarama ile yanıtlanır.
+            print(f"Komşu tablosu güncel değil, yok sayılıyor: {INDEX_NEIGHBORS_PATH}")
+            return None
+        return data["indices"], data["scores"]
 
 
 class ClipIndexer:
     def __init__(self) -> None:
-        self._model: Optional[torch.nn.Module] = None
+        self._encoder: Optional[VisionEncoder] = None
+        # Metin kulesi; onnx/torchscript arka uçlarında ilk metin aramasında yüklenir.
+        self._text_model: Optional[torch.nn.Module] = None
+        self._text_lock = threading.Lock()
         self._preprocess = None
         self._lock = asyncio.Lock()
-        self._embeddings: Optional[np.ndarray] = None
-        self._meta: List[dict] = []
+        self._ready = False
+        self._error = ""
+        self._warm_task: Optional[asyncio.Task] = None
+        # Aramalar her zaman tek bir snapshot üzerinde çalışır; /reload yenisini
+        # yanda hazırlayıp tek atamayla değiştirir.
+        self._snapshot: Optional[IndexSnapshot] = None
+        # Her snapshot değişiminde artar; sonuç önbelleği anahtarının parçasıdır.
+        self._generation = 0
+        # PIL decode, ön işlem ve model çıkarımı event loop'u bloklamasın diye
+        # sınırlı bir thread havuzunda çalışır; torch çıkarım sırasında GIL'i bırakır.
+        self._executor = ThreadPoolExecutor(max_workers=INFERENCE_WORKERS, thread_name_prefix="clip")
+        self._pending = 0
+        self._batch_queue: Optional[asyncio.Queue] = None
+        self._batch_task: Optional[asyncio.Task] = None
+        self._batch_slots: Optional[asyncio.Semaphore] = None
+        self._batch_runs: set = set()
+        # Aynı görselin tekrar yüklenmesinde decode/çıkarım atlanır; anahtar
+        # yüklenen baytların SHA-1 özetidir.
+        self.embedding_cache = LruCache(CACHE_SIZE, CACHE_TTL)
+        self.result_cache = LruCache(CACHE_SIZE if CACHE_RESULTS else 0, CACHE_TTL)
+        # Metin embedding'leri yalnızca modele bağlıdır; /reload ile temizlenmez.
+        self.text_cache = LruCache(CACHE_SIZE, CACHE_TTL)
+        self._tokenizer = None
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    @contextlib.contextmanager
+    def inference_slot(self) -> Iterator[None]:
+        if self._pending >= INFERENCE_WORKERS + INFERENCE_QUEUE:
+            raise InferenceBusyError("Servis meşgul, lütfen daha sonra tekrar deneyin")
+        self._pending += 1
+        try:
+            yield
+        finally:
+            self._pending -= 1
+
+    async def run_inference(self, func: Callable[..., T], *args) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args))
+
+    async def embed(self, data: bytes) -> np.ndarray:
+        """Tek bir görseli, eşzamanlı diğer sorgularla aynı batch'te vektörler.
+
+        İstekler en fazla CLIP_BATCH_WAIT_MS kadar ya da CLIP_BATCH adete kadar
+        toplanır, tek bir encode_image çağrısıyla işlenir ve sonuçlar bekleyen
+        isteklere dağıtılır.
+        """
+        if self._batch_task is None or self._batch_task.done():
+            self._batch_queue = asyncio.Queue()
+            self._batch_slots = asyncio.Semaphore(INFERENCE_WORKERS)
+            self._batch_task = asyncio.create_task(self._batch_loop())
+        future = asyncio.get_running_loop().create_future()
+        await self._batch_queue.put((data, future))
+        return await future
+
+    async def _batch_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            # Tüm işçiler meşgulken yeni batch toplanmaz; bekleyen istekler
+            # birikir ve bir sonraki batch doğal olarak büyür.
+            await self._batch_slots.acquire()
+            batch = [await self._batch_queue.get()]
+            deadline = loop.time() + BATCH_WAIT_MS / 1000
+            while len(batch) < BATCH_SIZE:
+                if not self._batch_queue.empty():
+                    batch.append(self._batch_queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._batch_queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            run = asyncio.create_task(self._run_batch(batch))
+            self._batch_runs.add(run)
+            run.add_done_callback(self._batch_runs.discard)
+
+    async def _run_batch(self, batch: List[Tuple[bytes, asyncio.Future]]) -> None:
+        try:
+            vectors = await self.run_inference(self._encode_many, [data for data, _ in batch])
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        finally:
+            self._batch_slots.release()
+        for (_, future), vector in zip(batch, vectors):
+            if future.done():
+                continue
+            if isinstance(vector, str):
+                future.set_exception(ValueError(vector))
+            else:
+                future.set_result(vector)
 
     def _load_model(self) -> None:
-        if self._model is not None:
+        if self._encoder is not None:
             return
-        model, _, preprocess = open_clip.create_model_and_transforms(
-            MODEL_NAME, pretrained=MODEL_PRETRAINED
+        threads = ONNX_THREADS if ENCODER_BACKEND == "onnx" else TORCH_THREADS
+        encoder, preprocess = load_vision_encoder(
+            ENCODER_BACKEND, MODEL_NAME, MODEL_PRETRAINED, DEVICE, ENCODER_PATH, threads
         )
-        model.eval()
-        model.to(DEVICE)
-        self._model = model
+        self._tokenizer = open_clip.get_tokenizer(MODEL_NAME)
+        self._text_model = getattr(encoder, "model", None)
+        self._encoder = encoder
         self._preprocess = preprocess
 
+    def _load_text_model(self) -> torch.nn.Module:
+        with self._text_lock:
+            if self._text_model is None:
+                model, _, _ = open_clip.create_model_and_transforms(MODEL_NAME, pretrained=MODEL_PRETRAINED)
+                model.eval()
+                model.to(DEVICE)
+                self._text_model = model
+            return self._text_model
+
     def _ensure_index(self) -> None:
-        if not INDEX_EMBED_PATH.exists() or not INDEX_META_PATH.exists():
-            raise FileNotFoundError(
-                "Embedding veya metadata dosyası bulunamadı. build_clip_index.py çalıştırın."
-            )
-        self._embeddings = np.load(INDEX_EMBED_PATH).astype("float32")
-        with INDEX_META_PATH.open("r", encoding="utf-8") as fh:
-            self._meta = json.load(fh)
-        if self._embeddings.shape[0] != len(self._meta):
-            raise RuntimeError("Embedding ve metadata sayıları eşleşmiyor")
+        if self._snapshot is None:
+            self._snapshot = load_snapshot()
+
+    @property
+    def count(self) -> int:
+        snapshot = self._snapshot
+        return snapshot.count if snapshot is not None else 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
 
     async def reload(self) -> None:
+        # Model'e dokunmaz; yeni index hazırlanırken aramalar eski snapshot'ı kullanır.
+        async with self._lock:
+            snapshot = await self.run_inference(load_snapshot)
+            previous, self._snapshot = self._snapshot, snapshot
+            self._generation += 1
+            self.embedding_cache.clear()
+            self.result_cache.clear()
+            if previous is not None:
+                previous.close()
+                del previous
+            # Önceki derlemenin dosyaları artık gerekmez; süren bir arama onları
+            # hâlâ eşliyorsa silme atlanır ve sonraki derlemede yeniden denenir.
+            await self.run_inference(remove_stale_builds, INDEX_EMBED_PATH, (snapshot.build_id,))
+        if not self._ready:
+            # Başlangıç ısınması (ör. index henüz yokken) başarısız olduysa yeniden
+            # başlatılır; aksi halde /readyz ilk aramaya kadar 503 kalırdı.
+            self.start_warm_up()
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    @property
+    def state(self) -> Tuple[str, str]:
+        if self._ready:
+            return "ok", ""
+        if self._warm_task is not None and not self._warm_task.done():
+            return "loading", "Model ve index yükleniyor"
+        if self._error:
+            return "error", self._error
+        return "loading", "Yükleme başlamadı"
+
+    def start_warm_up(self) -> asyncio.Task:
+        """Model ve index'i arka planda yükler; devam eden yüklemeyi yeniden başlatmaz."""
+        if self._warm_task is None or (self._warm_task.done() and not self._ready):
+            self._warm_task = asyncio.create_task(self._warm_up())
+            # Arka plan hatası "never retrieved" uyarısı üretmesin; durum `state` ile okunur.
+            self._warm_task.add_done_callback(lambda task: task.cancelled() or task.exception())
+        return self._warm_task
+
+    async def _warm_up(self) -> None:
         async with self._lock:
-            self._embeddings = None
-            self._meta = []
-            self._load_model()
-            self._ensure_index()
+            try:
+                await self.run_inference(self._load_model)
+                await self.run_inference(self._ensure_index)
+                await self.run_inference(self._warm_kernels)
+            except Exception as exc:
+                self._error = str(exc)
+                raise
+            self._error = ""
+            self._ready = True
+
+    def _warm_kernels(self) -> None:
+        # İlk gerçek isteğin kernel seçimi/bellek ayırma maliyetini ödememesi için.
+        self._encode_tensors([self._decode_blank()])
+
+    def _decode_blank(self) -> torch.Tensor:
+        return self._preprocess(Image.new("RGB", (256, 256)))
 
     async def ensure_ready(self) -> None:
-        if self._model is None or self._preprocess is None:
-            self._load_model()
-        if self._embeddings is None:
-            await self.reload()
+        if self._ready:
+            return
+        await asyncio.shield(self.start_warm_up())
 
-    def _encode_image(self, data: bytes) -> np.ndarray:
-        if self._model is None or self._preprocess is None:
+    def _decode_image(self, data: bytes) -> torch.Tensor:
+        if self._preprocess is None:
             raise RuntimeError("Model hazır değil")
         image = Image.open(io.BytesIO(data)).convert("RGB")
-        tensor = self._preprocess(image).unsqueeze(0).to(DEVICE)
+        return self._preprocess(image)
+
+    def _decode_images(self, datas: List[bytes]) -> Tuple[List[torch.Tensor], List[Optional[str]]]:
+        tensors: List[torch.Tensor] = []
+        errors: List[Optional[str]] = []
+        for data in datas:
+            try:
+                tensors.append(self._decode_image(data))
+                errors.append(None)
+            except Exception as exc:
+                errors.append(f"Görsel okunamadı: {exc}")
+        return tensors, errors
+
+    def _encode_tensors(self, tensors: List[torch.Tensor]) -> np.ndarray:
+        if self._encoder is None:
+            raise RuntimeError("Model hazır değil")
+        chunks = []
+        for start in range(0, len(tensors), BATCH_SIZE):
+            chunks.append(self._encoder.encode(torch.stack(tensors[start:start + BATCH_SIZE])))
+        return np.concatenate(chunks)
+
+    def _encode_many(self, datas: List[bytes]) -> List[object]:
+        # Her giriş için vektör ya da (okunamadıysa) hata mesajı döner.
+        tensors, errors = self._decode_images(datas)
+        vectors = iter(self._encode_tensors(tensors)) if tensors else iter(())
+        return [next(vectors) if error is None else error for error in errors]
+
+    def _encode_text(self, text: str) -> np.ndarray:
+        if self._encoder is None or self._tokenizer is None:
+            raise RuntimeError("Model hazır değil")
+        model = self._load_text_model()
+        tokens = self._tokenizer([text]).to(DEVICE)
         with torch.no_grad():
-            feats = self._model.encode_image(tensor)
+            feats = model.encode_text(tokens)
         feats = feats / feats.norm(dim=-1, keepdim=True)
         return feats.cpu().numpy().astype("float32")[0]
 
-    def search(self, vector: np.ndarray, top_k: int) -> List[dict]:
-        if self._embeddings is None:
+    def _encode_image(self, data: bytes) -> np.ndarray:
+        return self._encode_tensors([self._decode_image(data)])[0]
+
+    def check_filter(self, filters: SearchFilter) -> None:
+        snapshot = self._snapshot
+        if snapshot is not None:
+            snapshot.check_filter(filters)
+
+    def search(self, vector: np.ndarray, top_k: int, filters: Optional[SearchFilter] = None) -> List[dict]:
+        return self.search_batch(vector[None, :], top_k, filters)[0]
+
+    def search_batch(
+        self, matrix: np.ndarray, top_k: int, filters: Optional[SearchFilter] = None
+    ) -> List[List[dict]]:
+        snapshot = self._snapshot
+        if snapshot is None:
             raise RuntimeError("Index hazır değil")
-        top_k = max(1, min(top_k, self._embeddings.shape[0]))
-        scores = self._embeddings @ vector
-        idx = np.argpartition(-scores, top_k - 1)[:top_k]
-        sorted_idx = idx[np.argsort(-scores[idx])]
+        if not filters:
+            if matrix.shape[0] == 1:
+                hits = [snapshot.index.search(matrix[0], top_k)]
+            else:
+                hits = snapshot.index.search_batch(matrix, top_k)
+            return [self._build_results(snapshot, rows, scores) for rows, scores in hits]
+        # Filtreli sorgular yalnızca filtreye uyan satırları tam skorlar; top_k
+        # filtre içinde kesindir ve maliyet filtrelenen satır sayısıyla orantılıdır.
+        rows = snapshot.rows_for(filters)
+        if rows.size == 0:
+            return [[] for _ in range(matrix.shape[0])]
+        scores = matrix @ snapshot.embeddings[rows].T
         results = []
-        for i in sorted_idx:
-            meta = self._meta[i]
+        for row_scores in scores:
+            idx, top = select_top_k(row_scores, top_k)
+            results.append(self._build_results(snapshot, rows[idx], top))
+        return results
+
+    def similar(self, token: str, top_k: int, filters: Optional[SearchFilter] = None) -> Optional[List[dict]]:
+        """Arşivdeki bir görselin benzerlerini yeniden encode etmeden döner.
+
+        Komşu tablosu varsa ve yeterince geniş ise sonuç doğrudan tablodan
+        okunur; aksi halde görselin kayıtlı vektörüyle arama yapılır.
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            raise RuntimeError("Index hazır değil")
+        row = snapshot.token_rows().get(token)
+        if row is None:
+            return None
+        top_k = max(1, top_k)
+        if snapshot.neighbors is not None and not filters and top_k <= snapshot.neighbors[0].shape[1]:
+            indices, scores = snapshot.neighbors
+            return self._build_results(snapshot, indices[row, :top_k], scores[row, :top_k].astype(np.float32))
+        vector = np.asarray(snapshot.embeddings[row], dtype=np.float32)
+        results = self.search(vector, top_k + 1, filters)
+        return [item for item in results if item["token"] != token][:top_k]
+
+    @staticmethod
+    def _build_results(snapshot: IndexSnapshot, rows: np.ndarray, scores: np.ndarray) -> List[dict]:
+        results = []
+        for i, score in zip(rows, scores):
+            meta = snapshot.meta[i]
             results.append(
                 {
                     "path": meta["path"],
-                    "token": meta.get("token") or _make_token(meta["path"]),
+                    "token": meta.get("token") or make_token(meta["path"]),
                     "folder": meta.get("folder"),
                     "fileName": meta.get("fileName"),
-                    "score": float(scores[i]),
+                    "score": float(score),
                 }
             )
         return results
@@ -113,49 +930,234 @@ app.add_middleware(
 
 @app.on_event("startup")
 async def startup_event() -> None:
-    await indexer.ensure_ready()
+    # Yükleme arka planda yapılır; uvicorn bağlantı kabul etmeye hemen başlar.
+    indexer.start_warm_up()
+
+
+@app.on_event("shutdown")
+async def shutdown_event() -> None:
+    snapshot = indexer._snapshot
+    if snapshot is not None:
+        snapshot.close()
+
+
+@app.get("/livez")
+async def livez() -> dict:
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+async def readyz() -> JSONResponse:
+    status, message = indexer.state
+    return JSONResponse(
+        {"status": status, "message": message},
+        status_code=200 if indexer.ready else 503,
+    )
 
 
 @app.get("/healthz")
 async def healthz() -> dict:
-    status = "ok"
-    message = ""
+    # Ağır yüklemeyi tetiklemez ve beklemez; yalnızca mevcut durumu raporlar.
+    status, message = indexer.state
+    return {"status": status, "message": message, "pending": indexer.pending}
+
+
+def _search_filter(
+    folder: Optional[List[str]], root: Optional[List[str]], tag: Optional[List[str]]
+) -> SearchFilter:
+    roots = tuple(value.casefold() for value in root or ())
+    unknown = [value for value in roots if value not in ROOT_KINDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Geçersiz root: {', '.join(unknown)} (desen/varyant)")
+    return SearchFilter(folders=tuple(folder or ()), roots=roots, tags=tuple(tag or ()))
+
+
+async def _check_filter(filters: SearchFilter) -> None:
+    # Kök bilgisi olmayan eski metadata'da `root` filtresi sessizce boş sonuç dönmesin.
+    if not filters.roots:
+        return
     try:
-        await indexer.ensure_ready()
-    except Exception as exc:
-        status = "error"
-        message = str(exc)
-    return {"status": status, "message": message}
+        await indexer.run_inference(indexer.check_filter, filters)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
 @app.post("/search")
 async def search_endpoint(
     file: UploadFile = File(...),
-    top_k: int = TOP_K_DEFAULT
+    top_k: int = TOP_K_DEFAULT,
+    folder: Optional[List[str]] = Query(None),
+    root: Optional[List[str]] = Query(None),
+    tag: Optional[List[str]] = Query(None),
 ) -> dict:
+    filters = _search_filter(folder, root, tag)
     await indexer.ensure_ready()
+    await _check_filter(filters)
     data = await file.read()
     if not data:
         raise HTTPException(status_code=400, detail="Dosya boş")
+    digest = hashlib.sha1(data).hexdigest()
+    # Etiket filtresi tags_data.json değiştikçe farklı sonuç verir; önbelleğe alınmaz.
+    # Anahtar snapshot neslini içerir; arama sürerken /reload olursa eski
+    # index'in sonuçları yeni önbelleğe yazılmaz.
+    generation = indexer.generation
+    result_key = (generation, digest, top_k, filters) if not filters.tags else None
+    results = indexer.result_cache.get(result_key) if result_key else None
+    if results is not None:
+        return {"results": results, "all_results": results}
     try:
-        vector = indexer._encode_image(data)
-    except Exception as exc:
-        raise HTTPException(status_code=500, detail=f"Embedding üretilemedi: {exc}") from exc
+        with indexer.inference_slot():
+            vector = indexer.embedding_cache.get(digest)
+            if vector is None:
+                try:
+                    vector = await indexer.embed(data)
+                except Exception as exc:
+                    raise HTTPException(status_code=500, detail=f"Embedding üretilemedi: {exc}") from exc
+                indexer.embedding_cache.put(digest, vector)
+            try:
+                results = await indexer.run_inference(indexer.search, vector, top_k, filters)
+            except Exception as exc:
+                raise HTTPException(status_code=500, detail=f"Arama hatası: {exc}") from exc
+    except InferenceBusyError as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+    if result_key and indexer.generation == generation:
+        indexer.result_cache.put(result_key, results)
+    return {"results": results, "all_results": results}
+
+
+@app.get("/search/text")
+async def search_text_endpoint(
+    q: str = Query(..., min_length=1),
+    top_k: int = TOP_K_DEFAULT,
+    folder: Optional[List[str]] = Query(None),
+    root: Optional[List[str]] = Query(None),
+    tag: Optional[List[str]] = Query(None),
+) -> dict:
+    filters = _search_filter(folder, root, tag)
+    text = " ".join(q.split()).casefold()
+    if not text:
+        raise HTTPException(status_code=400, detail="Sorgu boş")
+    await indexer.ensure_ready()
+    await _check_filter(filters)
     try:
-        results = indexer.search(vector, top_k)
-    except Exception as exc:
-        raise HTTPException(status_code=500, detail=f"Arama hatası: {exc}") from exc
+        with indexer.inference_slot():
+            vector = indexer.text_cache.get(text)
+            if vector is None:
+                try:
+                    vector = await indexer.run_inference(indexer._encode_text, text)
+                except Exception as exc:
+                    raise HTTPException(status_code=500, detail=f"Metin embedding üretilemedi: {exc}") from exc
+                indexer.text_cache.put(text, vector)
+            try:
+                results = await indexer.run_inference(indexer.search, vector, top_k, filters)
+            except Exception as exc:
+                raise HTTPException(status_code=500, detail=f"Arama hatası: {exc}") from exc
+    except InferenceBusyError as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+    return {"query": q, "results": results, "all_results": results}
+
+
+@app.get("/similar/{token:path}")
+async def similar_endpoint(
+    token: str,
+    top_k: int = TOP_K_DEFAULT,
+    folder: Optional[List[str]] = Query(None),
+    root: Optional[List[str]] = Query(None),
+    tag: Optional[List[str]] = Query(None),
+) -> dict:
+    filters = _search_filter(folder, root, tag)
+    await indexer.ensure_ready()
+    await _check_filter(filters)
+    try:
+        with indexer.inference_slot():
+            try:
+                results = await indexer.run_inference(indexer.similar, token, top_k, filters)
+            except Exception as exc:
+                raise HTTPException(status_code=500, detail=f"Arama hatası: {exc}") from exc
+    except InferenceBusyError as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+    if results is None:
+        raise HTTPException(status_code=404, detail="Görsel index'te bulunamadı")
     return {"results": results, "all_results": results}
 
 
+@app.post("/search/batch")
+async def search_batch_endpoint(
+    files: List[UploadFile] = File(...),
+    top_k: int = TOP_K_DEFAULT,
+    folder: Optional[List[str]] = Query(None),
+    root: Optional[List[str]] = Query(None),
+    tag: Optional[List[str]] = Query(None),
+) -> dict:
+    filters = _search_filter(folder, root, tag)
+    await indexer.ensure_ready()
+    await _check_filter(filters)
+    items: List[dict] = []
+    datas: List[bytes] = []
+    positions: List[int] = []
+    for file in files:
+        item = {"fileName": file.filename, "results": [], "all_results": []}
+        data = await file.read()
+        if not data:
+            item["error"] = "Dosya boş"
+        else:
+            datas.append(data)
+            positions.append(len(items))
+        items.append(item)
+
+    if not datas:
+        return {"items": items, "count": len(items)}
+    try:
+        with indexer.inference_slot():
+            tensors, errors = await indexer.run_inference(indexer._decode_images, datas)
+            decoded = [position for position, error in zip(positions, errors) if error is None]
+            for position, error in zip(positions, errors):
+                if error is not None:
+                    items[position]["error"] = error
+            if not tensors:
+                return {"items": items, "count": len(items)}
+            try:
+                matrix = await indexer.run_inference(indexer._encode_tensors, tensors)
+            except Exception as exc:
+                raise HTTPException(status_code=500, detail=f"Embedding üretilemedi: {exc}") from exc
+            try:
+                batch_results = await indexer.run_inference(indexer.search_batch, matrix, top_k, filters)
+            except Exception as exc:
+                raise HTTPException(status_code=500, detail=f"Arama hatası: {exc}") from exc
+    except InferenceBusyError as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+    for position, results in zip(decoded, batch_results):
+        items[position]["results"] = results
+        items[position]["all_results"] = results
+    return {"items": items, "count": len(items)}
+
+
+@app.get("/stats")
+async def stats_endpoint() -> dict:
+    return {
+        "backend": ENCODER_BACKEND,
+        "pending": indexer.pending,
+        "embeddingCache": indexer.embedding_cache.stats(),
+        "resultCache": indexer.result_cache.stats(),
+        "textCache": indexer.text_cache.stats(),
+    }
+
+
 @app.post("/reload")
 async def reload_endpoint() -> dict:
-    await indexer.reload()
-    return {"status": "reloaded", "count": len(indexer._meta)}
+    try:
+        await indexer.reload()
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=f"Index yeniden yüklenemedi: {exc}") from exc
+    return {"status": "reloaded", "count": indexer.count}
 
 
 if __name__ == "__main__":
-    port = int(os.getenv("CLIP_PORT", "5000"))
-    import uvicorn
+    import runpy
+    import sys
 
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    # Uygulama uvicorn'a modül adıyla verilir ve uvicorn `__main__` olarak
+    # çalışır. Spawn ile başlayan shard işçileri ana modülü yeniden çalıştırdığından
+    # aksi halde her işçi bu dosyayı (torch, open_clip, FastAPI) yeniden yüklerdi.
+    sys.argv = ["uvicorn", "clip_service:app", "--host", "0.0.0.0", "--port", os.getenv("CLIP_PORT", "5000")]
+    runpy.run_module("uvicorn", run_name="__main__", alter_sys=True)
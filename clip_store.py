@@ -0,0 +1,218 @@
+"""CLIP index dosyalarının ortak okuma/yayınlama yardımcıları.
+
+Derleyici, servis ve rapor scriptleri tarafından paylaşılır; torch/open_clip
+içe aktarmaz, böylece yalnızca index okuyan araçlar modeli yüklemez.
+"""
+
+import base64
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+META_FORMAT_VERSION = 1
+ROOT_KINDS = ("desen", "varyant")
+
+
+def make_token(path: str) -> str:
+    return base64.b64encode(path.encode("utf-8")).decode("ascii")
+
+
+def load_columnar_metadata(path: Path) -> List[dict]:
+    with np.load(path) as data:
+        if int(data["version"]) != META_FORMAT_VERSION:
+            raise ValueError(f"Desteklenmeyen metadata sürümü: {int(data['version'])}")
+        roots = data["roots"].tolist()
+        root_kinds = data["root_kinds"].tolist() if "root_kinds" in data.files else list(ROOT_KINDS[: len(roots)])
+        dirs = data["dirs"].tolist()
+        folders = data["folders"].tolist()
+        root_ids = data["root_id"].tolist()
+        dir_ids = data["dir_id"].tolist()
+        folder_ids = data["folder_id"].tolist()
+        names = data["names"].tobytes()
+        offsets = data["name_offsets"].tolist()
+        mtimes = data["mtime"].tolist()
+        sizes = data["size"].tolist()
+        hashes = data["sha1"].tolist() if "sha1" in data.files else None
+
+    metadata = []
+    for row, (root_id, dir_id, folder_id) in enumerate(zip(root_ids, dir_ids, folder_ids)):
+        name = names[offsets[row]:offsets[row + 1]].decode("utf-8")
+        entry = {
+            "path": roots[root_id] + dirs[dir_id] + name,
+            "folder": folders[folder_id],
+            "fileName": name,
+            "root": root_kinds[root_id],
+            "mtime": mtimes[row],
+            "size": sizes[row],
+        }
+        if hashes and hashes[row]:
+            entry["sha1"] = hashes[row].decode("ascii")
+        metadata.append(entry)
+    return metadata
+
+
+def read_json_metadata(path: Path) -> Tuple[List[dict], Optional[str]]:
+    """JSON metadata satırlarını ve derleme kimliğini döner.
+
+    Derleyici `{"build_id": ..., "items": [...]}` yazar; eski düz liste
+    biçiminde kimlik None'dır.
+    """
+    with path.open("r", encoding="utf-8") as fh:
+        data = json.load(fh)
+    if isinstance(data, list):
+        return data, None
+    return data["items"], data.get("build_id")
+
+
+def load_metadata(meta_path: Path, meta_npz_path: Path) -> List[dict]:
+    """Sütunlu metadata varsa onu, yoksa JSON listesini okur."""
+    if meta_npz_path.exists():
+        return load_columnar_metadata(meta_npz_path)
+    return read_json_metadata(meta_path)[0]
+
+
+def load_embeddings(path: Path, mmap: bool = True) -> np.ndarray:
+    # mmap ile açılan matris kopyalanmaz; birden fazla uvicorn işçisi aynı
+    # page-cache sayfalarını paylaşır ve /reload dosya boyutundan bağımsızdır.
+    embeddings = np.load(path, mmap_mode="r" if mmap else None)
+    if embeddings.dtype != np.float32 or not embeddings.flags.c_contiguous:
+        # Eski (float64 vb.) index dosyaları için tek seferlik dönüşüm.
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    return embeddings
+
+
+def select_top_k(scores: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+    top_k = max(1, min(top_k, scores.shape[0]))
+    idx = np.argpartition(-scores, top_k - 1)[:top_k]
+    sorted_idx = idx[np.argsort(-scores[idx])]
+    return sorted_idx, scores[sorted_idx]
+
+
+# Shard işçi süreçleri yalnızca bu modülü içe aktarır; torch/open_clip ve servis
+# ayarları işçilere yüklenmez.
+_shard_matrices: Dict[Tuple[str, Tuple[int, int]], np.ndarray] = {}
+
+
+def _shard_matrix(path: str, stamp: Tuple[int, int], mmap: bool) -> np.ndarray:
+    key = (path, stamp)
+    embeddings = _shard_matrices.get(key)
+    if embeddings is None:
+        _shard_matrices.clear()
+        embeddings = load_embeddings(Path(path), mmap)
+        _shard_matrices[key] = embeddings
+    return embeddings
+
+
+def open_shard(path: str, stamp: Tuple[int, int], mmap: bool) -> int:
+    """İşçi sürecinde matrisi açar; havuz ilk aramadan önce hazırlanırken çağrılır."""
+    _shard_matrix(path, stamp, mmap)
+    return os.getpid()
+
+
+def search_shard(
+    path: str, stamp: Tuple[int, int], mmap: bool, start: int, end: int, queries: np.ndarray, top_k: int
+) -> List[Tuple[np.ndarray, np.ndarray]]:
+    # Shard işçi sürecinde çalışır. Dosya mmap ile açıldığından tüm işçiler aynı
+    # page-cache sayfalarını paylaşır; her işçi yalnızca kendi satır aralığını okur.
+    # mmap kapalıysa her işçi matrisin kendi kopyasını belleğe yükler.
+    block = np.asarray(_shard_matrix(path, stamp, mmap)[start:end], dtype=np.float32)
+    if block.shape[0] == 0:
+        return [(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)) for _ in queries]
+    return [(idx + start, scores) for idx, scores in (select_top_k(row, top_k) for row in queries @ block.T)]
+
+
+def manifest_path(embed_path: Path) -> Path:
+    return embed_path.with_suffix(".manifest.json")
+
+
+def build_embed_path(embed_path: Path, build_id: str) -> Path:
+    """Bir derlemenin embedding matrisi: `clip_embeddings.<build_id>.npy`."""
+    return embed_path.with_name(f"{embed_path.stem}.{build_id}{embed_path.suffix}")
+
+
+def _read_manifest(embed_path: Path) -> Optional[dict]:
+    manifest = manifest_path(embed_path)
+    if not manifest.exists():
+        return None
+    with manifest.open("r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def published_embeddings(embed_path: Path) -> Tuple[Path, Optional[str]]:
+    """Yayınlanmış derlemenin matris yolunu ve kimliğini döner.
+
+    Manifest yoksa eski sabit adlı dosyaya (`embed_path`) dönülür.
+    """
+    info = _read_manifest(embed_path)
+    if info is None:
+        return embed_path, None
+    return embed_path.with_name(info["embeddings"]), info["build_id"]
+
+
+def _build_files(embed_path: Path) -> Dict[str, List[Path]]:
+    # Derleme kimliği -> yayınlanmış dosyaları; yazımı süren `.tmp.` dosyaları hariç.
+    pattern = re.compile(rf"{re.escape(embed_path.stem)}\.([0-9a-f]{{32}})\..+")
+    builds: Dict[str, List[Path]] = {}
+    for path in embed_path.parent.glob(f"{embed_path.stem}.*"):
+        match = pattern.fullmatch(path.name)
+        if match is not None and ".tmp." not in path.name:
+            builds.setdefault(match.group(1), []).append(path)
+    return builds
+
+
+def write_manifest(embed_path: Path, build_id: str, published: Path, shape: Tuple[int, int]) -> None:
+    # Her derleme kendi dosya adıyla yazılır, yalnızca bu küçük dosya yerine
+    # taşınır. Windows eşlenmiş bir dosyanın üzerine yazmaya izin vermediğinden
+    # servisin açık tuttuğu eski matris yayını hiçbir zaman engellemez.
+    # Yerini alan derlemeler `superseded` listesinde, dosyaları silinene kadar tutulur.
+    previous = _read_manifest(embed_path)
+    superseded = [*previous.get("superseded", []), previous["build_id"]] if previous else []
+    existing = _build_files(embed_path)
+    superseded = [old for old in dict.fromkeys(superseded) if old != build_id and old in existing]
+    manifest = manifest_path(embed_path)
+    temp = manifest.with_name(f"{manifest.stem}.tmp{manifest.suffix}")
+    with temp.open("w", encoding="utf-8") as fh:
+        json.dump(
+            {
+                "build_id": build_id,
+                "embeddings": published.name,
+                "rows": shape[0],
+                "dim": shape[1],
+                "superseded": superseded,
+            },
+            fh,
+            ensure_ascii=False,
+            indent=2,
+        )
+    os.replace(temp, manifest)
+
+
+def remove_stale_builds(embed_path: Path, keep: Iterable[Optional[str]] = ()) -> List[Path]:
+    """Manifest'in yerini alındı olarak işaretlediği derlemelerin dosyalarını siler.
+
+    Yayındaki derleme ve `keep` içindekiler korunur. Hiçbir manifest'te adı
+    geçmeyen derlemeler (yazımı süren bir derleme) ve `.tmp.` dosyalarına
+    dokunulmaz. Hâlâ eşlenmiş olduğu için silinemeyen dosyalar atlanır; sonraki
+    derleme ya da /reload sırasında yeniden denenir.
+    """
+    info = _read_manifest(embed_path)
+    if info is None:
+        return []
+    keep_ids = {build_id for build_id in keep if build_id}
+    keep_ids.add(info["build_id"])
+    stale = set(info.get("superseded", [])) - keep_ids
+    removed = []
+    for build_id, paths in _build_files(embed_path).items():
+        if build_id not in stale:
+            continue
+        for path in paths:
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            removed.append(path)
+    return removed
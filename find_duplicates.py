@@ -0,0 +1,172 @@
+import argparse
+import csv
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from clip_store import load_metadata, make_token, published_embeddings
+
+
+def load_index(embed_path: Path, meta_path: Path, meta_npz_path: Path) -> Tuple[np.ndarray, List[dict]]:
+    embeddings = np.load(published_embeddings(embed_path)[0], mmap_mode="r")
+    metadata = load_metadata(meta_path, meta_npz_path)
+    if embeddings.shape[0] != len(metadata):
+        raise SystemExit("Embedding ve metadata sayıları eşleşmiyor, index'i yeniden oluşturun")
+    return embeddings, metadata
+
+
+def find_pairs(
+    embeddings: np.ndarray, threshold: float, block_rows: int = 2048
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Benzerliği `threshold` üzerindeki tüm (i < j) çiftlerini bulur.
+
+    Matris üst üçgendeki `block_rows x block_rows` karolar halinde çarpılır;
+    bellek kullanımı arşiv boyutundan bağımsız olarak tek karo kadardır.
+    """
+    total = embeddings.shape[0]
+    lefts, rights, scores = [], [], []
+    for start in range(0, total, block_rows):
+        block = np.asarray(embeddings[start:start + block_rows], dtype=np.float32)
+        for col_start in range(start, total, block_rows):
+            sims = block @ np.asarray(embeddings[col_start:col_start + block_rows], dtype=np.float32).T
+            if col_start == start:
+                # Köşegen karoda köşegen ve alt üçgen (j <= i) elenir.
+                sims[np.tril_indices(block.shape[0], m=sims.shape[1])] = -np.inf
+            rows, cols = np.nonzero(sims >= threshold)
+            lefts.append(rows + start)
+            rights.append(cols + col_start)
+            scores.append(sims[rows, cols])
+    if not lefts:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    return np.concatenate(lefts), np.concatenate(rights), np.concatenate(scores)
+
+
+def dhash(path: Path, size: int = 8) -> Optional[int]:
+    """64 bitlik fark (difference) hash; okunamayan dosyalarda None."""
+    try:
+        image = Image.open(path).convert("L").resize((size + 1, size), Image.LANCZOS)
+    except Exception:
+        return None
+    pixels = np.asarray(image, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int("".join("1" if bit else "0" for bit in bits), 2)
+
+
+def filter_by_phash(
+    metadata: List[dict],
+    lefts: np.ndarray,
+    rights: np.ndarray,
+    scores: np.ndarray,
+    max_distance: int,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    hashes: Dict[int, Optional[int]] = {}
+    for row in np.unique(np.concatenate([lefts, rights])):
+        hashes[int(row)] = dhash(Path(metadata[row]["path"]))
+    keep = np.zeros(lefts.shape[0], dtype=bool)
+    for position, (left, right) in enumerate(zip(lefts.tolist(), rights.tolist())):
+        a, b = hashes[left], hashes[right]
+        # Hash üretilemeyen dosyalarda yalnızca embedding benzerliği esas alınır.
+        keep[position] = a is None or b is None or bin(a ^ b).count("1") <= max_distance
+    return lefts[keep], rights[keep], scores[keep]
+
+
+def build_clusters(total: int, lefts: np.ndarray, rights: np.ndarray) -> List[List[int]]:
+    parent = list(range(total))
+
+    def find(node: int) -> int:
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    for left, right in zip(lefts.tolist(), rights.tolist()):
+        a, b = find(left), find(right)
+        if a != b:
+            parent[max(a, b)] = min(a, b)
+
+    groups: Dict[int, List[int]] = {}
+    for row in np.unique(np.concatenate([lefts, rights])).tolist() if lefts.size else []:
+        groups.setdefault(find(row), []).append(row)
+    return sorted(groups.values(), key=lambda rows: (-len(rows), rows[0]))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="CLIP embedding'leri üzerinden yakın kopya görselleri bulur")
+    parser.add_argument("--embed-path", type=Path, default=Path("clip_embeddings.npy"))
+    parser.add_argument("--meta-path", type=Path, default=Path("clip_metadata.json"))
+    parser.add_argument("--meta-npz-path", type=Path, help="Sütunlu metadata (varsayılan: <meta-path>.npz)")
+    parser.add_argument("--threshold", type=float, default=0.95, help="Kosinüs benzerliği eşiği")
+    parser.add_argument("--block-rows", type=int, default=2048, help="Matris çarpımı blok boyutu")
+    parser.add_argument("--phash", action="store_true", help="Adayları ayrıca algısal hash (dHash) ile doğrular")
+    parser.add_argument("--phash-max-distance", type=int, default=10, help="İzin verilen en fazla Hamming mesafesi")
+    parser.add_argument("--output", type=Path, default=Path("clip_duplicates.json"), help="JSON rapor dosyası")
+    parser.add_argument("--csv", type=Path, help="Ek olarak CSV rapor dosyası")
+    args = parser.parse_args()
+
+    embeddings, metadata = load_index(
+        args.embed_path, args.meta_path, args.meta_npz_path or args.meta_path.with_suffix(".npz")
+    )
+    lefts, rights, scores = find_pairs(embeddings, args.threshold, args.block_rows)
+    print(f"Eşik üzerindeki çift: {lefts.shape[0]}")
+    if args.phash and lefts.size:
+        lefts, rights, scores = filter_by_phash(metadata, lefts, rights, scores, args.phash_max_distance)
+        print(f"dHash doğrulamasından geçen çift: {lefts.shape[0]}")
+
+    best: Dict[int, float] = {}
+    for left, right, score in zip(lefts.tolist(), rights.tolist(), scores.tolist()):
+        best[left] = max(best.get(left, -1.0), score)
+        best[right] = max(best.get(right, -1.0), score)
+
+    clusters = []
+    for cluster_id, rows in enumerate(build_clusters(len(metadata), lefts, rights), start=1):
+        clusters.append(
+            {
+                "id": cluster_id,
+                "size": len(rows),
+                "items": [
+                    {
+                        "path": metadata[row]["path"],
+                        "token": make_token(metadata[row]["path"]),
+                        "folder": metadata[row].get("folder"),
+                        "fileName": metadata[row].get("fileName"),
+                        "bestScore": round(best[row], 4),
+                    }
+                    for row in rows
+                ],
+            }
+        )
+
+    report = {
+        "threshold": args.threshold,
+        "phash": args.phash,
+        "pairCount": int(lefts.shape[0]),
+        "clusterCount": len(clusters),
+        "clusters": clusters,
+    }
+    with args.output.open("w", encoding="utf-8") as fh:
+        json.dump(report, fh, ensure_ascii=False, indent=2)
+    if args.csv:
+        with args.csv.open("w", encoding="utf-8-sig", newline="") as fh:
+            writer = csv.writer(fh, delimiter=";")
+            writer.writerow(["cluster", "size", "folder", "fileName", "bestScore", "path", "token"])
+            for cluster in clusters:
+                for item in cluster["items"]:
+                    writer.writerow(
+                        [
+                            cluster["id"],
+                            cluster["size"],
+                            item["folder"],
+                            item["fileName"],
+                            item["bestScore"],
+                            item["path"],
+                            item["token"],
+                        ]
+                    )
+    print(f"Kaydedildi: {len(clusters)} küme, {args.output}" + (f", {args.csv}" if args.csv else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,16 @@
 import customtkinter as ctk
+import tkinter
 from tkinter import filedialog, messagebox
 from PIL import Image
+import bisect
 import os
+import re
+import struct
 import sys
 import json
+import zlib
+from collections.abc import MutableSequence
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 import threading
 import time
@@ -25,6 +32,272 @@ def get_exe_path():
 # Uygulama klasörü
 UYGULAMA_KLASORU = get_exe_path()
 
+# Klasör taraması
+DESTEKLENEN_FORMATLAR = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp'}
+TARAMA_ISCI_SAYISI = 8  # Paylaşımda aynı anda listelenecek alt klasör sayısı
+KLASOR_LISTESI_YENILEME_MS = 250  # Tarama sırasında klasör listesini en sık yenileme aralığı
+OZEL_KLASORLER = ["yeni tasarımlar", "yeni desen varyantları"]  # Listede hep en üstte
+
+# Sol liste satır türleri: (satır yüksekliği, satırlar arası boşluk)
+SOL_LISTE_SATIRLARI = {
+    "klasor": (40, 6),
+    "ozel_klasor": (50, 6),
+    "sonuc": (80, 10),
+    "pdf": (60, 20),
+    "bilgi": (60, 20),
+}
+NUMARA_DESENI = re.compile(r"(\d{3,})")
+
+# Binary tarama cache'i: başlık + klasör tablosu (zlib JSON) + klasör başına zlib blokları
+CACHE_BIN_IMZA = b"DYSC"
+CACHE_BIN_SURUM = 1
+CACHE_BIN_BASLIK = struct.Struct("<4sHI")  # imza, sürüm, tablo uzunluğu
+
+
+def _desen_satiri(desen):
+    return [desen['ad'], desen.get('boyut', 0), desen.get('numara', ''), desen.get('search_text', ''),
+            desen.get('etiketler', [])]
+
+
+def etiket_ozeti(desenler):
+    """(etiketli desen sayısı, benzersiz etiketler) - çözülmemiş cache klasörlerinde tablodan okunur"""
+    if isinstance(desenler, TembelDesenListesi) and desenler.ozet is not None:
+        return desenler.ozet
+    etiketli = 0
+    tum = set()
+    for desen in desenler:
+        if desen['etiketler']:
+            etiketli += 1
+            tum.update(desen['etiketler'])
+    return etiketli, sorted(tum)
+
+
+def _blok_kodla(satirlar):
+    return zlib.compress(json.dumps(satirlar, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+
+class TembelDesenListesi(MutableSequence):
+    """Binary cache'teki bir klasörün desenleri - ilk erişimde çözülür.
+    
+    Desen sayısı tablodan bilindiği için len() çözmeden yanıt verir; klasör listesi
+    arşiv boyutundan bağımsız çizilir. Çözülmemiş blok cache yazılırken olduğu gibi kopyalanır.
+    """
+    
+    def __init__(self, ana_klasor, klasor_adi, adet, blok, ozet=None):
+        self._klasor = os.path.join(str(ana_klasor), klasor_adi)
+        self._adet = adet
+        self._blok = blok
+        self._ozet = ozet
+        self._desenler = None
+        self._lock = threading.Lock()
+    
+    @property
+    def ozet(self):
+        # Çözüldükten sonra etiketler değişebilir; tablo özeti geçersiz olur
+        return self._ozet if self._desenler is None else None
+    
+    def _liste(self):
+        if self._desenler is None:
+            with self._lock:
+                if self._desenler is None:
+                    klasor = Path(self._klasor)
+                    self._desenler = [
+                        {
+                            'dosya': klasor / ad,
+                            'ad': ad,
+                            'boyut': boyut,
+                            'etiketler': etiketler,
+                            'numara': numara,
+                            'search_text': search_text
+                        }
+                        for ad, boyut, numara, search_text, etiketler in json.loads(zlib.decompress(self._blok))
+                    ]
+                    self._blok = None
+        return self._desenler
+    
+    def satirlar(self):
+        """Desen dict'leri oluşturmadan (ad, boyut, numara, search_text, etiketler) satırları"""
+        blok = self._blok
+        if blok is not None:
+            return json.loads(zlib.decompress(blok))
+        return [_desen_satiri(desen) for desen in self._desenler]
+    
+    def kodlanmis_blok(self):
+        blok = self._blok
+        return bytes(blok) if blok is not None else _blok_kodla(self.satirlar())
+    
+    def __len__(self):
+        return self._adet if self._desenler is None else len(self._desenler)
+    
+    def __getitem__(self, index):
+        return self._liste()[index]
+    
+    def __setitem__(self, index, deger):
+        self._liste()[index] = deger
+    
+    def __delitem__(self, index):
+        del self._liste()[index]
+    
+    def insert(self, index, deger):
+        self._liste().insert(index, deger)
+    
+    def __iter__(self):
+        return iter(self._liste())
+    
+    def __repr__(self):
+        return f"TembelDesenListesi({self._klasor!r}, {len(self)})"
+
+
+def cache_bin_yaz(cache_dosyasi, desenler_dict, klasor_izleri):
+    """Binary cache'i geçici dosyaya yazıp tek adımda yerine taşı"""
+    bloklar = []
+    tablo = []
+    for klasor_adi, desenler in desenler_dict.items():
+        if isinstance(desenler, TembelDesenListesi):
+            blok = desenler.kodlanmis_blok()
+        else:
+            blok = _blok_kodla([_desen_satiri(desen) for desen in desenler])
+        etiketli, etiketler = etiket_ozeti(desenler)
+        tablo.append([klasor_adi, len(desenler), len(blok), etiketli, etiketler])
+        bloklar.append(blok)
+    baslik = zlib.compress(json.dumps(
+        {'timestamp': time.time(), 'klasorler': klasor_izleri, 'bloklar': tablo},
+        ensure_ascii=False, separators=(',', ':')
+    ).encode('utf-8'))
+    gecici = cache_dosyasi.with_name(cache_dosyasi.name + '.tmp')
+    with open(gecici, 'wb') as f:
+        f.write(CACHE_BIN_BASLIK.pack(CACHE_BIN_IMZA, CACHE_BIN_SURUM, len(baslik)))
+        f.write(baslik)
+        for blok in bloklar:
+            f.write(blok)
+    os.replace(gecici, cache_dosyasi)
+
+
+def cache_bin_oku(cache_dosyasi, ana_klasor):
+    """Binary cache'ten (desenler_dict, klasor_izleri) oku; desenler ilk erişimde çözülür"""
+    veri = memoryview(Path(cache_dosyasi).read_bytes())
+    imza, surum, baslik_uzunlugu = CACHE_BIN_BASLIK.unpack_from(veri)
+    if imza != CACHE_BIN_IMZA or surum != CACHE_BIN_SURUM:
+        raise ValueError(f"desteklenmeyen cache sürümü: {imza!r} v{surum}")
+    konum = CACHE_BIN_BASLIK.size
+    baslik = json.loads(zlib.decompress(veri[konum:konum + baslik_uzunlugu]))
+    konum += baslik_uzunlugu
+    desenler_dict = {}
+    for klasor_adi, adet, uzunluk, etiketli, etiketler in baslik['bloklar']:
+        desenler_dict[klasor_adi] = TembelDesenListesi(
+            ana_klasor, klasor_adi, adet, veri[konum:konum + uzunluk], (etiketli, etiketler)
+        )
+        konum += uzunluk
+    return desenler_dict, baslik.get('klasorler', {})
+
+def _trigramlar(metin):
+    """Kelime başı/sonu işaretli trigramlar - 1-2 harfli kelimeler de en az bir trigram üretir"""
+    gramlar = set()
+    for kelime in metin.split():
+        k = "\x02" + kelime + "\x03"
+        for i in range(len(k) - 2):
+            gramlar.add(k[i:i + 3])
+    return gramlar
+
+
+class AramaIndeksi:
+    """Desen search_text'leri üzerinde trigram ters indeksi.
+    
+    Sorgudaki her kelime, search_text içinde alt dize olarak aranır (eski doğrusal
+    aramayla aynı anlam). 3+ harfli kelimeler trigram listelerinin kesişimiyle,
+    1-2 harfli kelimeler o harfleri içeren trigram listelerinin birleşimiyle daraltılır;
+    adaylar son olarak metinle doğrulanır. Klasörler tarama thread'inden, tekil desenler
+    etiket değişiminde güncellenir.
+    """
+    
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._listeler = {}  # trigram -> {doc_id}
+        self._belgeler = {}  # doc_id -> (kategori, klasor_adi, idx, search_text)
+        self._klasorler = {}  # (kategori, klasor_adi) -> (desen listesi, [doc_id])
+        self._sonraki_id = 0
+    
+    def _ekle(self, kategori, klasor_adi, idx, metin):
+        doc_id = self._sonraki_id
+        self._sonraki_id += 1
+        self._belgeler[doc_id] = (kategori, klasor_adi, idx, metin)
+        for gram in _trigramlar(metin):
+            self._listeler.setdefault(gram, set()).add(doc_id)
+        return doc_id
+    
+    def _sil(self, doc_id):
+        _, _, _, metin = self._belgeler.pop(doc_id)
+        for gram in _trigramlar(metin):
+            liste = self._listeler.get(gram)
+            if liste is not None:
+                liste.discard(doc_id)
+                if not liste:
+                    del self._listeler[gram]
+    
+    def klasor_indeksli_mi(self, kategori, klasor_adi, desenler):
+        """Klasör bu liste nesnesiyle indekslendiyse True (tarama listeyi değiştirmediyse)"""
+        kayit = self._klasorler.get((kategori, klasor_adi))
+        return kayit is not None and kayit[0] is desenler
+    
+    def klasor_guncelle(self, kategori, klasor_adi, desenler, metinler):
+        with self._lock:
+            self.klasor_sil(kategori, klasor_adi)
+            doc_idler = [self._ekle(kategori, klasor_adi, idx, metin) for idx, metin in enumerate(metinler)]
+            self._klasorler[(kategori, klasor_adi)] = (desenler, doc_idler)
+    
+    def klasor_sil(self, kategori, klasor_adi):
+        with self._lock:
+            kayit = self._klasorler.pop((kategori, klasor_adi), None)
+            if kayit:
+                for doc_id in kayit[1]:
+                    self._sil(doc_id)
+    
+    def desen_guncelle(self, kategori, klasor_adi, idx, metin):
+        """Tek desenin metni değişti (etiket ekleme/silme)"""
+        with self._lock:
+            kayit = self._klasorler.get((kategori, klasor_adi))
+            if not kayit or idx >= len(kayit[1]):
+                return
+            self._sil(kayit[1][idx])
+            kayit[1][idx] = self._ekle(kategori, klasor_adi, idx, metin)
+    
+    def kategori_klasorleri(self, kategori):
+        with self._lock:
+            return [klasor_adi for (kat, klasor_adi) in self._klasorler if kat == kategori]
+    
+    def ara(self, kelimeler):
+        """Tüm kelimeleri içeren desenler: [(kategori, klasor_adi, idx)] - sırasız"""
+        with self._lock:
+            aday = None
+            # Uzun kelimeler genelde daha seçicidir; önce onlar
+            for kelime in sorted(set(kelimeler), key=len, reverse=True):
+                if len(kelime) >= 3:
+                    listeler = sorted(
+                        (self._listeler.get(kelime[i:i + 3], set()) for i in range(len(kelime) - 2)), key=len
+                    )
+                    kume = set(listeler[0])
+                    for liste in listeler[1:]:
+                        if not kume:
+                            break
+                        kume &= liste
+                else:
+                    kume = set()
+                    for gram, liste in self._listeler.items():
+                        if kelime in gram:
+                            kume |= liste
+                aday = kume if aday is None else aday & kume
+                if not aday:
+                    return []
+            if aday is None:
+                return []
+            sonuc = []
+            for doc_id in aday:
+                kategori, klasor_adi, idx, metin = self._belgeler[doc_id]
+                if all(k in metin for k in kelimeler):
+                    sonuc.append((kategori, klasor_adi, idx))
+            return sonuc
+
+
 # JPG İzleyici ve Boyutlandırıcı - Lazy import için parent class
 try:
     from watchdog.events import FileSystemEventHandler as _WatchdogBase
@@ -134,6 +407,308 @@ class JPGWatcher(_WatchdogBase):
         msg = f"✅ {filename}\n{old_w}x{old_h} → {new_w}x{new_h}"
         messagebox.showinfo("Resim Boyutlandırıldı", msg)
 
+class SanalListe(ctk.CTkFrame):
+    """Yalnızca görünen satırları widget olarak tutan kaydırılabilir liste.
+    
+    Öğeler (tür, veri) çiftleridir; satır yükseklikleri türe göre sabittir. Kaydırmada
+    görünürden çıkan satır widget'ları havuza döner ve aynı türden yeni öğelere
+    `bagla(veri)` ile yeniden bağlanır. Binlerce öğede de widget sayısı ekrana
+    sığan satır sayısıyla sınırlı kalır.
+    """
+    
+    KAYDIRMA_ADIMI = 60  # Tekerlek/ok başına piksel
+    
+    def __init__(self, master, satir_olustur, satir_yukseklikleri, **kwargs):
+        super().__init__(master, **kwargs)
+        self._satir_olustur = satir_olustur  # (tur, parent) -> bagla(veri) metodlu widget
+        self._yukseklikler = satir_yukseklikleri
+        self._ogeler = []
+        self._konumlar = [0]  # Satır üst kenarları; son eleman toplam yükseklik
+        self._ust = 0
+        self._gorunen = {}  # öğe index -> satır widget'ı
+        self._havuz = {}  # tur -> [boştaki satır widget'ları]
+        
+        self.grid_propagate(False)
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+        renk = self._fg_color if self._fg_color != "transparent" else self._bg_color
+        self._alan = tkinter.Frame(self, bg=self._apply_appearance_mode(renk), highlightthickness=0, bd=0)
+        self._alan.grid(row=0, column=0, padx=5, sticky="nsew")
+        self._kaydirma_cubugu = ctk.CTkScrollbar(self, command=self._kaydirma_komutu)
+        self._kaydirma_cubugu.grid(row=0, column=1, sticky="ns")
+        self._alan.bind("<Configure>", lambda e: self._ciz())
+        self._tekerlek_bagla(self._alan)
+    
+    def goster(self, ogeler, basa_don=True):
+        """Listeyi yeni öğelerle çiz; basa_don False ise kaydırma konumu korunur"""
+        self._ogeler = list(ogeler)
+        konumlar = [0]
+        for tur, _ in self._ogeler:
+            yukseklik, bosluk = self._yukseklikler[tur]
+            konumlar.append(konumlar[-1] + yukseklik + bosluk)
+        self._konumlar = konumlar
+        if basa_don:
+            self._ust = 0
+        # Görünen satırların verisi artık geçersiz; yerlerinden kaldırmadan havuza al (titreme olmasın)
+        eskiler = list(self._gorunen.values())
+        for satir in eskiler:
+            self._havuz.setdefault(satir.tur, []).append(satir)
+        self._gorunen = {}
+        self._ciz()
+        kullanilan = set(map(id, self._gorunen.values()))
+        for satir in eskiler:
+            if id(satir) not in kullanilan:
+                satir.place_forget()
+    
+    def _yeni_satir(self, tur):
+        satir = self._satir_olustur(tur, self._alan)
+        satir.tur = tur
+        self._tekerlek_bagla(satir)
+        return satir
+    
+    def _tekerlek_bagla(self, widget):
+        # CTk widget'ları iç canvas/label'lardan oluşur; olaylar en içtekine gelir
+        for olay in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            tkinter.Misc.bind(widget, olay, self._tekerlek, add="+")
+        for cocuk in widget.winfo_children():
+            self._tekerlek_bagla(cocuk)
+    
+    def _tekerlek(self, event):
+        if getattr(event, "num", None) == 4 or getattr(event, "delta", 0) > 0:
+            adim = -1
+        else:
+            adim = 1
+        self._kaydir(self._ust + adim * self.KAYDIRMA_ADIMI)
+        return "break"  # Dıştaki kaydırılabilir panel de kaymasın
+    
+    def _kaydirma_komutu(self, islem, miktar, birim=None):
+        if islem == "moveto":
+            self._kaydir(float(miktar) * self._konumlar[-1])
+        elif birim == "pages":
+            self._kaydir(self._ust + int(miktar) * self._alan.winfo_height())
+        else:
+            self._kaydir(self._ust + int(miktar) * self.KAYDIRMA_ADIMI)
+    
+    def _kaydir(self, ust):
+        self._ust = ust
+        self._ciz()
+    
+    def _ciz(self):
+        gorunur = max(1, self._alan.winfo_height())
+        toplam = self._konumlar[-1]
+        self._ust = int(max(0, min(self._ust, toplam - gorunur)))
+        bas = max(0, bisect.bisect_right(self._konumlar, self._ust) - 1)
+        son = min(len(self._ogeler), bisect.bisect_left(self._konumlar, self._ust + gorunur))
+        
+        # Görünürden çıkan satırları havuza geri ver
+        for index in [i for i in self._gorunen if i < bas or i >= son]:
+            satir = self._gorunen.pop(index)
+            satir.place_forget()
+            self._havuz.setdefault(satir.tur, []).append(satir)
+        
+        for index in range(bas, son):
+            tur, veri = self._ogeler[index]
+            satir = self._gorunen.get(index)
+            if satir is None:
+                havuz = self._havuz.get(tur)
+                satir = havuz.pop() if havuz else self._yeni_satir(tur)
+                satir.bagla(veri)
+                self._gorunen[index] = satir
+            bosluk = self._yukseklikler[tur][1]
+            satir.place(x=0, y=self._konumlar[index] - self._ust + bosluk // 2, relwidth=1.0)
+        
+        if toplam <= gorunur:
+            self._kaydirma_cubugu.set(0.0, 1.0)
+        else:
+            self._kaydirma_cubugu.set(self._ust / toplam, (self._ust + gorunur) / toplam)
+
+
+class KlasorSatiri(ctk.CTkFrame):
+    """Sol listede tıklanabilir klasör satırı (özel klasörler yıldızlı)"""
+    
+    def __init__(self, master, ozel, tikla):
+        super().__init__(
+            master,
+            corner_radius=6,
+            height=SOL_LISTE_SATIRLARI["ozel_klasor" if ozel else "klasor"][0],
+            cursor="hand2"
+        )
+        self.grid_propagate(False)
+        self._ozel = ozel
+        self._tikla = tikla
+        self._klasor_adi = None
+        self._ana_renk = "#1f6aa5"
+        self._hover_renk = "#144870"
+        
+        if ozel:
+            # Özel klasör için grid ayarları
+            self.grid_columnconfigure(0, weight=0)  # Sol yıldızlar
+            self.grid_columnconfigure(1, weight=1)  # Klasör adı ve sayı
+            self.grid_columnconfigure(2, weight=0)  # Sağ yıldızlar
+            self.grid_rowconfigure(0, weight=1)
+            
+            # Sol yıldızlar (sarı)
+            sol_yildiz = ctk.CTkLabel(
+                self,
+                text="★★★",
+                font=ctk.CTkFont(size=16, weight="bold"),
+                text_color="#FFD700"  # Parlak altın sarısı
+            )
+            sol_yildiz.grid(row=0, column=0, sticky="w", padx=(8, 5))
+            
+            # Orta kısım - Klasör adı ve sayısı birlikte
+            self._orta_label = ctk.CTkLabel(
+                self,
+                text="",
+                font=ctk.CTkFont(size=12, weight="bold"),
+                text_color="white",
+                justify="center"
+            )
+            self._orta_label.grid(row=0, column=1, sticky="ew", padx=5)
+            
+            # Sağ yıldızlar (sarı)
+            sag_yildiz = ctk.CTkLabel(
+                self,
+                text="★★★",
+                font=ctk.CTkFont(size=16, weight="bold"),
+                text_color="#FFD700"  # Parlak altın sarısı
+            )
+            sag_yildiz.grid(row=0, column=2, sticky="e", padx=(5, 8))
+            widgets_to_bind = [self, sol_yildiz, self._orta_label, sag_yildiz]
+        else:
+            # Normal klasör için grid ayarları
+            self.grid_columnconfigure(0, weight=1)
+            self.grid_rowconfigure(0, weight=1)
+            self.grid_rowconfigure(1, weight=1)
+            
+            # Klasör adı label (beyaz)
+            self._klasor_label = ctk.CTkLabel(
+                self,
+                text="",
+                font=ctk.CTkFont(size=12, weight="bold"),
+                text_color="white"
+            )
+            self._klasor_label.grid(row=0, column=0, sticky="ew", padx=5)
+            
+            # Desen sayısı label (kırmızı)
+            self._sayi_label = ctk.CTkLabel(
+                self,
+                text="",
+                font=ctk.CTkFont(size=12, weight="bold"),
+                text_color="#ff5252"
+            )
+            self._sayi_label.grid(row=1, column=0, sticky="ew", padx=5)
+            widgets_to_bind = [self, self._klasor_label, self._sayi_label]
+        
+        # Hover efekti ve tıklama - satır yeniden bağlandığında güncel klasöre gider
+        for widget in widgets_to_bind:
+            widget.bind("<Enter>", lambda e: self.configure(fg_color=self._hover_renk))
+            widget.bind("<Leave>", lambda e: self.configure(fg_color=self._ana_renk))
+            widget.bind("<Button-1>", lambda e: self._tikla(self._klasor_adi))
+    
+    def bagla(self, veri):
+        klasor_adi, desen_sayisi, secili_mi = veri
+        self._klasor_adi = klasor_adi
+        
+        # Renk belirleme - seçili ise yeşil, değilse mavi
+        if secili_mi:
+            self._ana_renk = "#2e7d32"  # Koyu yeşil (seçili)
+            self._hover_renk = "#1b5e20"  # Daha koyu yeşil
+        else:
+            self._ana_renk = "#1f6aa5"  # Mavi (normal)
+            self._hover_renk = "#144870"  # Koyu mavi
+        self.configure(fg_color=self._ana_renk)
+        
+        # Klasör adını kısalt (çok uzunsa)
+        max_uzunluk = 18 if self._ozel else 28  # Yıldızlar için daha fazla yer bırak
+        klasor_goster = klasor_adi
+        if len(klasor_adi) > max_uzunluk:
+            klasor_goster = klasor_adi[:max_uzunluk-3] + "..."
+        
+        if self._ozel:
+            self._orta_label.configure(text=f"{klasor_goster}\n({desen_sayisi} desen)")
+        else:
+            self._klasor_label.configure(text=klasor_goster)
+            self._sayi_label.configure(text=f"({desen_sayisi} desen)")
+
+
+class AramaSonucSatiri(ctk.CTkFrame):
+    """Arama sonucu satırı: seçim checkbox'ı ve desene giden buton"""
+    
+    def __init__(self, master, metin_olustur, secili_mi, secim_degistir, git):
+        super().__init__(master, corner_radius=6, height=SOL_LISTE_SATIRLARI["sonuc"][0])
+        self.grid_propagate(False)
+        self.grid_columnconfigure(1, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+        self._metin_olustur = metin_olustur
+        self._secili_mi = secili_mi
+        self._anahtar = None
+        
+        # Checkbox
+        self._secim = ctk.BooleanVar(value=False)
+        checkbox = ctk.CTkCheckBox(
+            self,
+            text="",
+            variable=self._secim,
+            width=30,
+            command=lambda: secim_degistir(*self._anahtar, self._secim)
+        )
+        checkbox.grid(row=0, column=0, padx=(10, 5), pady=10)
+        
+        # Desen bilgisi butonu
+        self._btn = ctk.CTkButton(
+            self,
+            text="",
+            command=lambda: git(*self._anahtar),
+            fg_color="#1f6aa5",
+            hover_color="#144870",
+            height=70,
+            anchor="center",
+            font=ctk.CTkFont(size=11)
+        )
+        self._btn.grid(row=0, column=1, padx=5, pady=5, sticky="ew")
+    
+    def bagla(self, anahtar):
+        # Metin yalnızca görünen satırlar için üretilir
+        self._anahtar = anahtar
+        self._secim.set(self._secili_mi(anahtar))
+        self._btn.configure(text=self._metin_olustur(*anahtar))
+
+
+class PdfSatiri(ctk.CTkFrame):
+    """Arama sonuçlarının sonunda seçili desenlerden PDF butonu"""
+    
+    def __init__(self, master, komut):
+        super().__init__(master, corner_radius=6, fg_color="#1f6aa5", height=SOL_LISTE_SATIRLARI["pdf"][0])
+        self.pack_propagate(False)
+        self._btn = ctk.CTkButton(
+            self,
+            text="",
+            command=komut,
+            fg_color="#1f6aa5",
+            hover_color="#144870",
+            height=50,
+            font=ctk.CTkFont(size=13, weight="bold")
+        )
+        self._btn.pack(padx=5, pady=5, fill="x")
+    
+    def bagla(self, secili_sayisi):
+        self._btn.configure(text=f"📄 Seçili Desenlerden\nPDF Oluştur ({secili_sayisi})")
+
+
+class BilgiSatiri(ctk.CTkFrame):
+    """Liste boşken gösterilen gri bilgi metni"""
+    
+    def __init__(self, master):
+        super().__init__(master, fg_color="transparent", height=SOL_LISTE_SATIRLARI["bilgi"][0])
+        self.pack_propagate(False)
+        self._label = ctk.CTkLabel(self, text="", text_color="gray", font=ctk.CTkFont(size=12))
+        self._label.pack(padx=10, expand=True)
+    
+    def bagla(self, metin):
+        self._label.configure(text=metin)
+
+
 class DesenYonetimSistemi(ctk.CTk):
     def __init__(self):
         super().__init__()
@@ -160,6 +735,8 @@ class DesenYonetimSistemi(ctk.CTk):
         self.varyantlar_ayarlar_dosyasi = None
         self.desenler_cache_dosyasi = None
         self.varyantlar_cache_dosyasi = None
+        self.desenler_klasor_izleri = {}  # {klasor_adi: {'mtime': float, 'adet': int}} - artımlı tarama için
+        self.varyantlar_klasor_izleri = {}
         self.tam_ekran_pencere = None
         self.filigran_var = ctk.BooleanVar(value=True)  # Filigran varsayılan açık
         self.arama_sonuclari = []  # Arama sonuçlarını sakla (kategori, klasor_adi, desen_index)
@@ -173,6 +750,8 @@ class DesenYonetimSistemi(ctk.CTk):
         self.max_cache_size = 50  # Cache boyutu azaltıldı - daha hızlı
         self._save_after_id = None  # Kaydetme throttle için
         self._arama_after_id = None  # Arama debounce için
+        self._klasor_listesi_after_id = None  # Tarama sırasında liste yenileme throttle için
+        self.arama_indeksi = AramaIndeksi()  # Tarama ile birlikte kurulan trigram indeksi
         
         # Zoom için değişkenler
         self.zoom_level = 1.0  # 1.0 = normal boyut
@@ -395,15 +974,17 @@ class DesenYonetimSistemi(ctk.CTk):
         klasor_frame.grid_rowconfigure(0, weight=1)
         klasor_frame.grid_columnconfigure(0, weight=1)
 
-        # Scrollable frame - Minimum yükseklik ile daha fazla öğe gösterilir
-        self.klasor_listesi = ctk.CTkScrollableFrame(
+        # Sanal liste - yalnızca görünen klasör/sonuç satırları oluşturulur
+        self.klasor_listesi = SanalListe(
             klasor_frame,
+            satir_olustur=self._sol_liste_satiri_olustur,
+            satir_yukseklikleri=SOL_LISTE_SATIRLARI,
             corner_radius=8,
             height=450,
             fg_color="transparent"
         )
         self.klasor_listesi.grid(row=0, column=0, padx=10, pady=10, sticky="nsew")
-        self.klasor_listesi.grid_columnconfigure(0, weight=1)
+        self._sol_liste_modu = "klasor"  # "klasor" veya "arama"
 
         # Alt butonlar ve arama frame - sol panelin en altına sabitlendi
         alt_butonlar_frame = ctk.CTkFrame(self.sol_panel, corner_radius=8, fg_color="transparent")
@@ -841,13 +1422,8 @@ class DesenYonetimSistemi(ctk.CTk):
         toplam_desen = sum(len(desenler) for desenler in self.desenler.values()) + \
                       sum(len(desenler) for desenler in self.varyantlar.values())
         etiketli_desen = sum(
-            1 for desenler in self.desenler.values()
-            for desen in desenler
-            if desen['etiketler']
-        ) + sum(
-            1 for desenler in self.varyantlar.values()
-            for desen in desenler
-            if desen['etiketler']
+            etiket_ozeti(desenler)[0]
+            for desenler in list(self.desenler.values()) + list(self.varyantlar.values())
         )
         # Değerleri ayrı etiketlere yazarak simetriyi koru
         try:
@@ -862,18 +1438,16 @@ class DesenYonetimSistemi(ctk.CTk):
         tum = set()
         try:
             for desenler in self.desenler.values():
-                for d in desenler:
-                    for e in d.get('etiketler', []):
-                        if isinstance(e, str):
-                            tum.add(e.strip())
+                for e in etiket_ozeti(desenler)[1]:
+                    if isinstance(e, str):
+                        tum.add(e.strip())
         except Exception:
             pass
         try:
             for desenler in self.varyantlar.values():
-                for d in desenler:
-                    for e in d.get('etiketler', []):
-                        if isinstance(e, str):
-                            tum.add(e.strip())
+                for e in etiket_ozeti(desenler)[1]:
+                    if isinstance(e, str):
+                        tum.add(e.strip())
         except Exception:
             pass
         return sorted(tum)
@@ -892,9 +1466,8 @@ class DesenYonetimSistemi(ctk.CTk):
     def desen_numarasini_cikar(self, ad: str) -> str:
         """Dosya adından desen numarasını çıkar (ilk 3+ haneli sayı)."""
         try:
-            import re, os
             isim = os.path.splitext(ad)[0]
-            m = re.search(r"(\d{3,})", isim)
+            m = NUMARA_DESENI.search(isim)
             return m.group(1) if m else ""
         except Exception:
             return ""
@@ -1192,6 +1765,7 @@ class DesenYonetimSistemi(ctk.CTk):
         
         # Alt klasörleri tara
         self.alt_klasorleri_yukle(kategori)
+        self.arama_indeksini_guncelle(kategori)
         
         # Klasör listesini güncelle
         self.klasor_listesini_guncelle()
@@ -1223,33 +1797,56 @@ class DesenYonetimSistemi(ctk.CTk):
             self.deseni_goster()
 
     def cacheten_yukle(self, kategori):
-        """Kategori için cache dosyasından hızlı yükleme yap (varsa)"""
+        """Kategori için cache dosyasından hızlı yükleme yap (varsa)
+        
+        Önce binary cache (.bin) okunur: yalnızca klasör tablosu çözülür, desenler
+        klasöre ilk erişimde açılır. Yoksa eski JSON cache'e dönülür.
+        """
         try:
             cache_dosyasi = self.desenler_cache_dosyasi if kategori == "Desenler" else self.varyantlar_cache_dosyasi
-            if not cache_dosyasi or not Path(cache_dosyasi).exists():
+            ana_klasor = self.desenler_ana_klasor if kategori == "Desenler" else self.varyantlar_ana_klasor
+            if not cache_dosyasi:
+                return
+            bin_dosyasi = Path(cache_dosyasi).with_suffix('.bin')
+            if bin_dosyasi.exists():
+                try:
+                    desenler_dict, izler = cache_bin_oku(bin_dosyasi, ana_klasor)
+                except Exception as e:
+                    print(f"{kategori} binary cache okunamadı, JSON deneniyor: {e}")
+                    desenler_dict, izler = self._json_cacheten_oku(cache_dosyasi)
+            else:
+                desenler_dict, izler = self._json_cacheten_oku(cache_dosyasi)
+            if desenler_dict is None:
                 return
-            with open(cache_dosyasi, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            desenler_dict = {}
-            for klasor_adi, liste in data.get('desenler', {}).items():
-                desenler_dict[klasor_adi] = [
-                    {
-                        'dosya': Path(item['dosya']),
-                        'ad': item['ad'],
-                        'boyut': item.get('boyut', 0),
-                        'etiketler': item.get('etiketler', []),
-                        'numara': item.get('numara') or self.desen_numarasini_cikar(item.get('ad', '')),
-                        'search_text': self.olustur_search_text(item.get('ad', ''), item.get('etiketler', []))
-                    }
-                    for item in liste
-                ]
             if kategori == "Desenler":
                 self.desenler = desenler_dict
             else:
                 self.varyantlar = desenler_dict
+            setattr(self, f'{kategori.lower()}_klasor_izleri', izler)
             print(f"⚡ {kategori} cache'den yüklendi: {len(desenler_dict)} klasör")
         except Exception as e:
             print(f"{kategori} cache yükleme hatası: {e}")
+    
+    def _json_cacheten_oku(self, cache_dosyasi):
+        """Eski JSON cache formatını oku (binary cache yoksa)"""
+        if not Path(cache_dosyasi).exists():
+            return None, {}
+        with open(cache_dosyasi, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        desenler_dict = {}
+        for klasor_adi, liste in data.get('desenler', {}).items():
+            desenler_dict[klasor_adi] = [
+                {
+                    'dosya': Path(item['dosya']),
+                    'ad': item['ad'],
+                    'boyut': item.get('boyut', 0),
+                    'etiketler': item.get('etiketler', []),
+                    'numara': item.get('numara') or self.desen_numarasini_cikar(item.get('ad', '')),
+                    'search_text': self.olustur_search_text(item.get('ad', ''), item.get('etiketler', []))
+                }
+                for item in liste
+            ]
+        return desenler_dict, data.get('klasorler', {})
 
     def taramayi_arkaplanda_baslat(self, kategori):
         """Alt klasör taramasını ana thread'i bloklamadan çalıştır"""
@@ -1259,9 +1856,20 @@ class DesenYonetimSistemi(ctk.CTk):
         if not ana_klasor or not Path(ana_klasor).exists():
             return
         
+        def _ilerleme(klasor_adi, desenler):
+            # Her biten klasör ana thread'de listeye eklenir
+            self.after(0, self._klasor_tarandi_ui_guncelle, kategori, klasor_adi, desenler)
+        
         def _is():
-            # Ağ/disk taraması burada yapılır
-            self.alt_klasorleri_yukle(kategori)
+            # Diğer kategori açılışta cache'ten yüklenmedi; artımlı tarama için izler gerekli
+            if not (self.desenler if kategori == "Desenler" else self.varyantlar):
+                self.cacheten_yukle(kategori)
+            # Arama cache'teki verilerle hemen indeksli çalışsın
+            self.arama_indeksini_guncelle(kategori)
+            # Ağ/disk taraması burada yapılır - yalnızca izi değişen klasörler listelenir
+            self.alt_klasorleri_yukle(kategori, ilerleme=_ilerleme, artimli=True)
+            # Yalnızca değişen klasörler yeniden indekslenir
+            self.arama_indeksini_guncelle(kategori)
             # Cache'e yaz
             self.cache_kaydet(kategori)
             # UI güncellemesi ana thread'de
@@ -1269,10 +1877,52 @@ class DesenYonetimSistemi(ctk.CTk):
         
         threading.Thread(target=_is, daemon=True).start()
     
+    def arama_indeksini_guncelle(self, kategori):
+        """Arama indeksini kategorinin güncel klasörleriyle eşitle (tarama thread'inde çalışabilir)"""
+        desenler_dict = self.desenler if kategori == "Desenler" else self.varyantlar
+        for klasor_adi, desenler in list(desenler_dict.items()):
+            if self.arama_indeksi.klasor_indeksli_mi(kategori, klasor_adi, desenler):
+                continue
+            if isinstance(desenler, TembelDesenListesi) and desenler.ozet is not None:
+                # Çözülmemiş cache klasörü: desen dict'leri oluşturmadan metinleri al
+                metinler = [satir[3] for satir in desenler.satirlar()]
+            else:
+                metinler = [
+                    desen.get('search_text') or self.olustur_search_text(desen['ad'], desen.get('etiketler', []))
+                    for desen in desenler
+                ]
+            self.arama_indeksi.klasor_guncelle(kategori, klasor_adi, desenler, metinler)
+        for klasor_adi in self.arama_indeksi.kategori_klasorleri(kategori):
+            if klasor_adi not in desenler_dict:
+                self.arama_indeksi.klasor_sil(kategori, klasor_adi)
+    
+    def _klasor_tarandi_ui_guncelle(self, kategori, klasor_adi, desenler):
+        """Tarama sürerken biten bir klasörü listeye ekle (kısmi sonuç)"""
+        desenler_dict = self.desenler if kategori == "Desenler" else self.varyantlar
+        desenler_dict[klasor_adi] = desenler
+        if self.aktif_kategori == kategori and self._klasor_listesi_after_id is None:
+            # Her klasörde tüm listeyi yeniden çizmemek için yenilemeyi seyrelt
+            self._klasor_listesi_after_id = self.after(
+                KLASOR_LISTESI_YENILEME_MS, self._klasor_listesi_throttled_guncelle
+            )
+    
+    def _klasor_listesi_throttled_guncelle(self):
+        self._klasor_listesi_after_id = None
+        if self._arama_gosteriliyor():
+            # Kullanıcı arama yapıyorsa sonuçlar silinmesin; yalnızca sayılar güncellenir
+            self.istatistikleri_guncelle()
+            return
+        self.klasor_listesini_guncelle()
+    
+    def _arama_gosteriliyor(self):
+        """Sol listede arama sonuçları var mı (ya da arama kutusu dolu mu)"""
+        return self._sol_liste_modu == "arama" or bool(self.arama_entry.get().strip())
+    
     def _tarama_bitti_ui_guncelle(self, kategori):
         """Taramadan sonra UI'ı uygun şekilde yenile"""
-        # Sadece ilgili kategorideysek listeyi yenile; değilsek de sayıları güncelle
-        if self.aktif_kategori == kategori:
+        # Sadece ilgili kategorideysek listeyi yenile; değilsek de sayıları güncelle.
+        # Arama sonuçları gösteriliyorsa liste ve seçim olduğu gibi bırakılır.
+        if self.aktif_kategori == kategori and not self._arama_gosteriliyor():
             self.klasor_listesini_guncelle()
             # Varsayılan seçim korunur; seçili klasör yoksa ilkini seçebiliriz
             aktif_desenler = self.get_aktif_kategori_desenler()
@@ -1421,245 +2071,212 @@ class DesenYonetimSistemi(ctk.CTk):
         except Exception as e:
             print(f"{kategori} ayarları yüklenemedi: {str(e)}")
         
-    def alt_klasorleri_yukle(self, kategori):
-        """Alt klasörleri tara ve desenleri yükle - kategori bazlı - OPTIMIZE EDİLDİ"""
+    def alt_klasorleri_yukle(self, kategori, ilerleme=None, artimli=False):
+        """Alt klasörleri tara ve desenleri yükle - kategori bazlı - OPTIMIZE EDİLDİ
+        
+        Alt klasörler os.scandir ile paralel listelenir; `ilerleme(klasor_adi, desenler)`
+        verilirse her klasör bittiğinde (tarama thread'inden) çağrılır. `artimli` ise
+        mtime'ı cache'teki izle aynı olan klasörler yeniden listelenmez, cache'teki
+        desenleri kullanılır.
+        """
         print(f"{kategori} taranıyor...")
         
         ana_klasor = self.desenler_ana_klasor if kategori == "Desenler" else self.varyantlar_ana_klasor
-        etiketler_dosyasi = self.desenler_etiketler_dosyasi if kategori == "Desenler" else self.varyantlar_etiketler_dosyasi
         
         if not ana_klasor or not ana_klasor.exists():
             print(f"⚠️ {kategori} ana klasörü bulunamadı!")
             return
         
-        desteklenen_formatlar = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp'}
-        desenler_dict = {}
+        # Etiket dosyası yüklenmediyse (arkaplan taraması) cache'teki etiketler korunur
+        kaydedilmis = getattr(self, f'{kategori.lower()}_kaydedilmis_etiketler', None)
+        mevcut = dict(self.desenler if kategori == "Desenler" else self.varyantlar)
+        eski_izler = getattr(self, f'{kategori.lower()}_klasor_izleri', {}) if artimli else {}
+        
+        # Ana klasör altındaki alt klasörler - DirEntry tür bilgisi ek istek yapmaz,
+        # klasör mtime'ı Windows'ta listelemeyle birlikte gelir (klasör başına en fazla bir stat)
+        alt_klasorler = []
+        mtimeler = {}
+        with os.scandir(ana_klasor) as girdiler:
+            for girdi in girdiler:
+                try:
+                    if girdi.is_dir():
+                        alt_klasorler.append(girdi.name)
+                        mtimeler[girdi.name] = girdi.stat().st_mtime
+                except OSError:
+                    continue
         
-        # Ana klasör altındaki tüm alt klasörleri tara
-        for alt_klasor in ana_klasor.iterdir():
-            if alt_klasor.is_dir():
-                desenler = []
-                for dosya in alt_klasor.iterdir():
-                    if dosya.suffix.lower() in desteklenen_formatlar:
-                        desen_bilgi = {
-                            'dosya': dosya,
-                            'ad': dosya.name,
-                            'boyut': 0,  # Lazy load - gerekince hesaplanacak
-                            'etiketler': []
-                        }
-                        # Kaydedilmiş etiketleri yükle
-                        dosya_key = str(dosya.relative_to(ana_klasor))
-                        if hasattr(self, f'{kategori.lower()}_kaydedilmis_etiketler'):
-                            kaydedilmis = getattr(self, f'{kategori.lower()}_kaydedilmis_etiketler')
-                            if dosya_key in kaydedilmis:
-                                desen_bilgi['etiketler'] = kaydedilmis[dosya_key]
-                        # Numara ve arama metni ekle
-                        desen_bilgi['numara'] = self.desen_numarasini_cikar(dosya.name)
-                        desen_bilgi['search_text'] = self.olustur_search_text(dosya.name, desen_bilgi['etiketler'])
-                        desenler.append(desen_bilgi)
-                
+        sonuclar = {}
+        izler = {}
+        taranacak = []
+        for klasor_adi in alt_klasorler:
+            iz = eski_izler.get(klasor_adi)
+            onceki = mevcut.get(klasor_adi, [])
+            if iz and iz.get('mtime') == mtimeler[klasor_adi] and len(onceki) <= iz.get('adet', 0):
+                if onceki:
+                    sonuclar[klasor_adi] = onceki
+                izler[klasor_adi] = iz
+            else:
+                taranacak.append(klasor_adi)
+        
+        with ThreadPoolExecutor(max_workers=TARAMA_ISCI_SAYISI) as havuz:
+            isler = {
+                havuz.submit(
+                    self._alt_klasor_tara, ana_klasor, klasor_adi, kaydedilmis, mevcut.get(klasor_adi, [])
+                ): klasor_adi
+                for klasor_adi in taranacak
+            }
+            for is_ in as_completed(isler):
+                klasor_adi = isler[is_]
+                try:
+                    desenler, adet = is_.result()
+                except OSError as e:
+                    print(f"⚠️ {klasor_adi} taranamadı: {e}")
+                    # Geçici ağ hatasında klasör listeden düşmesin; iz yazılmaz, sonra yeniden denenir
+                    if mevcut.get(klasor_adi):
+                        sonuclar[klasor_adi] = mevcut[klasor_adi]
+                    continue
+                izler[klasor_adi] = {'mtime': mtimeler[klasor_adi], 'adet': adet}
                 if desenler:
-                    desenler_dict[alt_klasor.name] = sorted(desenler, key=lambda x: x['ad'])
+                    sonuclar[klasor_adi] = desenler
+                    if ilerleme:
+                        ilerleme(klasor_adi, desenler)
+        
+        # Sıra ana klasör listesiyle aynı kalsın
+        desenler_dict = {klasor_adi: sonuclar[klasor_adi] for klasor_adi in alt_klasorler if klasor_adi in sonuclar}
         
         # Kategoriyi güncelle
         if kategori == "Desenler":
             self.desenler = desenler_dict
         else:
             self.varyantlar = desenler_dict
+        setattr(self, f'{kategori.lower()}_klasor_izleri', izler)
         
-        print(f"✅ {len(desenler_dict)} klasör, {sum(len(d) for d in desenler_dict.values())} {kategori.lower()} yüklendi")
+        print(
+            f"✅ {len(desenler_dict)} klasör, {sum(len(d) for d in desenler_dict.values())} {kategori.lower()} yüklendi"
+            f" ({len(taranacak)} klasör listelendi)"
+        )
+    
+    def _alt_klasor_tara(self, ana_klasor, klasor_adi, kaydedilmis, onceki):
+        """Tek bir alt klasörün desenlerini listele (tarama thread'inde çalışır)
+        
+        (desenler, klasördeki toplam girdi sayısı) döner.
+        """
+        onceki_etiketler = {desen['ad']: desen['etiketler'] for desen in onceki}
+        desenler = []
+        adet = 0
+        with os.scandir(os.path.join(ana_klasor, klasor_adi)) as girdiler:
+            for girdi in girdiler:
+                adet += 1
+                if os.path.splitext(girdi.name)[1].lower() not in DESTEKLENEN_FORMATLAR:
+                    continue
+                # Kaydedilmiş etiketleri yükle (anahtar ana klasöre göre göreli yol)
+                if kaydedilmis is not None:
+                    etiketler = kaydedilmis.get(os.path.join(klasor_adi, girdi.name), [])
+                else:
+                    etiketler = onceki_etiketler.get(girdi.name, [])
+                desenler.append({
+                    'dosya': Path(girdi.path),
+                    'ad': girdi.name,
+                    'boyut': 0,  # Lazy load - gerekince hesaplanacak
+                    'etiketler': etiketler,
+                    'numara': self.desen_numarasini_cikar(girdi.name),
+                    'search_text': self.olustur_search_text(girdi.name, etiketler)
+                })
+        return sorted(desenler, key=lambda x: x['ad']), adet
     
     def cache_kaydet(self, kategori):
-        """Desen listesini cache'e kaydet - kategori bazlı"""
+        """Desen listesini cache'e kaydet - kategori bazlı
+        
+        Uygulama binary cache'i (.bin) okur; ASP.NET CacheController için aynı
+        içerik JSON olarak da yazılır. İki dosya da geçici dosya + rename ile yazılır.
+        """
         cache_dosyasi = self.desenler_cache_dosyasi if kategori == "Desenler" else self.varyantlar_cache_dosyasi
         
         if not cache_dosyasi:
             return
         
         try:
-            import time
             desenler_dict = self.desenler if kategori == "Desenler" else self.varyantlar
+            izler = getattr(self, f'{kategori.lower()}_klasor_izleri', {})
+            cache_dosyasi = Path(cache_dosyasi)
+            cache_bin_yaz(cache_dosyasi.with_suffix('.bin'), desenler_dict, izler)
             
+            ana_klasor = str(self.desenler_ana_klasor if kategori == "Desenler" else self.varyantlar_ana_klasor)
             cache_data = {
                 'timestamp': time.time(),
+                'klasorler': izler,
                 'desenler': {}
             }
             
-            # Desenleri kaydet
+            # Desenleri kaydet - çözülmemiş klasörler için desen dict'leri oluşturulmaz
             for klasor_adi, desenler in desenler_dict.items():
+                if isinstance(desenler, TembelDesenListesi):
+                    satirlar = desenler.satirlar()
+                else:
+                    satirlar = [_desen_satiri(desen) for desen in desenler]
                 cache_data['desenler'][klasor_adi] = [
                     {
-                        'dosya': str(desen['dosya']),
-                        'ad': desen['ad'],
-                        'boyut': desen['boyut'],
-                        'etiketler': desen.get('etiketler', []),
-                        'numara': desen.get('numara', self.desen_numarasini_cikar(desen.get('ad', '')))
+                        'dosya': os.path.join(ana_klasor, klasor_adi, ad),
+                        'ad': ad,
+                        'boyut': boyut,
+                        'etiketler': etiketler,
+                        'numara': numara
                     }
-                    for desen in desenler
+                    for ad, boyut, numara, _, etiketler in satirlar
                 ]
             
-            with open(cache_dosyasi, 'w', encoding='utf-8') as f:
-                json.dump(cache_data, f, ensure_ascii=False, indent=2)
+            gecici = cache_dosyasi.with_name(cache_dosyasi.name + '.tmp')
+            with open(gecici, 'w', encoding='utf-8') as f:
+                json.dump(cache_data, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(gecici, cache_dosyasi)
             
             print(f"{kategori} cache kaydedildi!")
         except Exception as e:
             print(f"{kategori} cache kaydetme hatası: {e}")
                     
+    def _sol_liste_satiri_olustur(self, tur, parent):
+        """Sanal liste için satır widget'ı üret (satırlar kaydırmada yeniden kullanılır)"""
+        if tur in ("klasor", "ozel_klasor"):
+            return KlasorSatiri(parent, ozel=(tur == "ozel_klasor"), tikla=self.klasor_sec_desen)
+        if tur == "sonuc":
+            return AramaSonucSatiri(
+                parent,
+                metin_olustur=self._arama_sonucu_metni,
+                secili_mi=lambda anahtar: anahtar in self.secili_desenler,
+                secim_degistir=self.desen_secim_degistir,
+                git=self.desene_git
+            )
+        if tur == "pdf":
+            return PdfSatiri(parent, komut=self.secili_desenlerden_pdf_secenekleri_goster)
+        return BilgiSatiri(parent)
+    
     def klasor_listesini_guncelle(self):
         """Klasör listesini aktif kategoriye göre güncelle"""
-        # Eski widget'ları temizle
-        for widget in self.klasor_listesi.winfo_children():
-            widget.destroy()
+        # Arama listesinden dönülüyorsa başa kaydır; aksi halde konum korunur
+        basa_don = self._sol_liste_modu != "klasor"
+        self._sol_liste_modu = "klasor"
         
         # Aktif kategorinin desenlerini al
         aktif_desenler = self.get_aktif_kategori_desenler()
         
         if not aktif_desenler:
             # Klasör yoksa mesaj göster
-            bos_label = ctk.CTkLabel(
-                self.klasor_listesi,
-                text=f"'{self.aktif_kategori}' klasöründe\nalt klasör bulunamadı",
-                text_color="gray",
-                font=ctk.CTkFont(size=12)
+            self.klasor_listesi.goster(
+                [("bilgi", f"'{self.aktif_kategori}' klasöründe\nalt klasör bulunamadı")], basa_don=True
             )
-            bos_label.grid(row=0, column=0, padx=10, pady=20)
             return
         
-        # Özel klasörler (hep en üstte)
-        ozel_klasorler = ["yeni tasarımlar", "yeni desen varyantları"]
-        
-        # Klasörleri sırala: önce özel klasörler, sonra alfabetik
+        # Klasörleri sırala: önce özel klasörler (büyük/küçük harf duyarsız), sonra alfabetik
+        ozel_kucuk = [k.lower() for k in OZEL_KLASORLER]
         tum_klasorler = list(aktif_desenler.keys())
-        sirali_klasorler = []
-        
-        # Önce özel klasörleri ekle (varsa) - büyük/küçük harf duyarsız
-        for klasor in tum_klasorler:
-            klasor_lower = klasor.lower()
-            if klasor_lower in [k.lower() for k in ozel_klasorler]:
-                sirali_klasorler.append(klasor)
-        
-        # Sonra diğer klasörleri alfabetik ekle
-        diger_klasorler = []
-        for klasor in tum_klasorler:
-            klasor_lower = klasor.lower()
-            if klasor_lower not in [k.lower() for k in ozel_klasorler]:
-                diger_klasorler.append(klasor)
-        
-        # Diğerlerini alfabetik sırala ve ekle
-        sirali_klasorler.extend(sorted(diger_klasorler))
-            
-        # Yeni klasör butonları ekle
-        for i, klasor_adi in enumerate(sirali_klasorler):
-            desen_sayisi = len(aktif_desenler[klasor_adi])
-            
-            # Özel klasör mü kontrol et
-            ozel_mi = klasor_adi.lower() in [k.lower() for k in ozel_klasorler]
-            
-            # Seçili mi kontrol et
-            secili_mi = (self.aktif_klasor == klasor_adi)
-            
-            # Renk belirleme - seçili ise yeşil, değilse mavi
-            if secili_mi:
-                ana_renk = "#2e7d32"  # Koyu yeşil (seçili)
-                hover_renk = "#1b5e20"  # Daha koyu yeşil
-            else:
-                ana_renk = "#1f6aa5"  # Mavi (normal)
-                hover_renk = "#144870"  # Koyu mavi
-            
-            # Klasör adını kısalt (çok uzunsa)
-            max_uzunluk = 18 if ozel_mi else 28  # Yıldızlar için daha fazla yer bırak
-            klasor_goster = klasor_adi
-            if len(klasor_adi) > max_uzunluk:
-                klasor_goster = klasor_adi[:max_uzunluk-3] + "..."
-            
-            # Tıklanabilir frame (buton gibi)
-            frame = ctk.CTkFrame(
-                self.klasor_listesi,
-                fg_color=ana_renk,
-                corner_radius=6,
-                height=50 if ozel_mi else 40,  # Özel klasör için daha yüksek
-                cursor="hand2"
-            )
-            frame.grid(row=i, column=0, padx=5, pady=3, sticky="ew")
-            frame.grid_propagate(False)
-            
-            if ozel_mi:
-                # Özel klasör için grid ayarları
-                frame.grid_columnconfigure(0, weight=0)  # Sol yıldızlar
-                frame.grid_columnconfigure(1, weight=1)  # Klasör adı ve sayı
-                frame.grid_columnconfigure(2, weight=0)  # Sağ yıldızlar
-                frame.grid_rowconfigure(0, weight=1)
-                
-                # Sol yıldızlar (sarı)
-                sol_yildiz = ctk.CTkLabel(
-                    frame,
-                    text="★★★",
-                    font=ctk.CTkFont(size=16, weight="bold"),
-                    text_color="#FFD700"  # Parlak altın sarısı
-                )
-                sol_yildiz.grid(row=0, column=0, sticky="w", padx=(8, 5))
-                
-                # Orta kısım - Klasör adı ve sayısı birlikte
-                orta_text = f"{klasor_goster}\n({desen_sayisi} desen)"
-                orta_label = ctk.CTkLabel(
-                    frame,
-                    text=orta_text,
-                    font=ctk.CTkFont(size=12, weight="bold"),
-                    text_color="white",
-                    justify="center"
-                )
-                orta_label.grid(row=0, column=1, sticky="ew", padx=5)
-                
-                # Sağ yıldızlar (sarı)
-                sag_yildiz = ctk.CTkLabel(
-                    frame,
-                    text="★★★",
-                    font=ctk.CTkFont(size=16, weight="bold"),
-                    text_color="#FFD700"  # Parlak altın sarısı
-                )
-                sag_yildiz.grid(row=0, column=2, sticky="e", padx=(5, 8))
-            else:
-                # Normal klasör için grid ayarları
-                frame.grid_columnconfigure(0, weight=1)
-                frame.grid_rowconfigure(0, weight=1)
-                frame.grid_rowconfigure(1, weight=1)
-                
-                # Klasör adı label (beyaz)
-                klasor_label = ctk.CTkLabel(
-                    frame,
-                    text=klasor_goster,
-                    font=ctk.CTkFont(size=12, weight="bold"),
-                    text_color="white"
-                )
-                klasor_label.grid(row=0, column=0, sticky="ew", padx=5)
-                
-                # Desen sayısı label (kırmızı)
-                sayi_label = ctk.CTkLabel(
-                    frame,
-                    text=f"({desen_sayisi} desen)",
-                    font=ctk.CTkFont(size=12, weight="bold"),
-                    text_color="#ff5252"
-                )
-                sayi_label.grid(row=1, column=0, sticky="ew", padx=5)
-            
-            # Hover efekti için bind
-            def on_enter(e, f=frame, hr=hover_renk):
-                f.configure(fg_color=hr)
-            def on_leave(e, f=frame, ar=ana_renk):
-                f.configure(fg_color=ar)
-            def on_click(e, k=klasor_adi):
-                self.klasor_sec_desen(k)
-            
-            # Tüm widget'lara bind - özel klasör için tüm widget'ları topla
-            if ozel_mi:
-                widgets_to_bind = [frame, sol_yildiz, orta_label, sag_yildiz]
-            else:
-                widgets_to_bind = [frame, klasor_label, sayi_label]
-            
-            for widget in widgets_to_bind:
-                widget.bind("<Enter>", on_enter)
-                widget.bind("<Leave>", on_leave)
-                widget.bind("<Button-1>", on_click)
+        sirali_klasorler = [k for k in tum_klasorler if k.lower() in ozel_kucuk]
+        sirali_klasorler.extend(sorted(k for k in tum_klasorler if k.lower() not in ozel_kucuk))
+        
+        ogeler = []
+        for klasor_adi in sirali_klasorler:
+            tur = "ozel_klasor" if klasor_adi.lower() in ozel_kucuk else "klasor"
+            ogeler.append((tur, (klasor_adi, len(aktif_desenler[klasor_adi]), self.aktif_klasor == klasor_adi)))
+        self.klasor_listesi.goster(ogeler, basa_don=basa_don)
             
     def kategori_sec(self, kategori):
         """Kategori seç (Desenler veya Varyantlar) ve klasör listesini güncelle"""
@@ -2065,6 +2682,9 @@ class DesenYonetimSistemi(ctk.CTk):
             desen['etiketler'].append(etiket)
             # Arama metnini güncelle (hızlı arama için)
             desen['search_text'] = self.olustur_search_text(desen['ad'], desen['etiketler'])
+            self.arama_indeksi.desen_guncelle(
+                self.aktif_kategori, self.aktif_klasor, self.aktif_desen_index, desen['search_text']
+            )
             self.etiket_entry.delete(0, 'end')
             self.etiketleri_goster()
             self.etiketleri_kaydet()
@@ -2172,6 +2792,9 @@ class DesenYonetimSistemi(ctk.CTk):
             desen['etiketler'].remove(etiket)
             # Arama metnini güncelle (hızlı arama için)
             desen['search_text'] = self.olustur_search_text(desen['ad'], desen['etiketler'])
+            self.arama_indeksi.desen_guncelle(
+                self.aktif_kategori, self.aktif_klasor, self.aktif_desen_index, desen['search_text']
+            )
             self.etiketleri_goster()
             self.etiketleri_kaydet()
             self.istatistikleri_guncelle()
@@ -2237,7 +2860,6 @@ class DesenYonetimSistemi(ctk.CTk):
             
     def arama_yap(self, event=None):
         """Desen/numara/etiket arama - hızlı ve doğru sonuç"""
-        import os
         arama_terimi = self.arama_entry.get().strip().lower()
         if not arama_terimi:
             self.klasor_listesini_guncelle()
@@ -2245,113 +2867,89 @@ class DesenYonetimSistemi(ctk.CTk):
             self.secili_desenler = set()
             return
             
-        # Eski widget'ları temizle
-        for widget in self.klasor_listesi.winfo_children():
-            widget.destroy()
-            
-        bulunan_sayac = 0
-        self.arama_sonuclari = []
-        
         tokens = [t for t in arama_terimi.split() if t]
-
-        # Desenler kategorisinde ara
-        for klasor_adi, desenler in self.desenler.items():
-            for idx, desen in enumerate(desenler):
-                st = desen.get('search_text') or self.olustur_search_text(desen['ad'], desen.get('etiketler', []))
-                if all(t in st for t in tokens):
-                    self.arama_sonuclari.append(("Desenler", klasor_adi, idx))
-        
-        # Varyantlar kategorisinde ara
-        for klasor_adi, desenler in self.varyantlar.items():
-            for idx, desen in enumerate(desenler):
-                st = desen.get('search_text') or self.olustur_search_text(desen['ad'], desen.get('etiketler', []))
-                if all(t in st for t in tokens):
-                    self.arama_sonuclari.append(("Varyantlar", klasor_adi, idx))
-                        
-        if self.arama_sonuclari:
-            # Her bulunan desen için seçim checkbox'lı buton
-            for i, (kategori, klasor_adi, desen_idx) in enumerate(self.arama_sonuclari):
-                # Kategoriye göre doğru dict'i seç
-                desenler_dict = self.desenler if kategori == "Desenler" else self.varyantlar
-                desen = desenler_dict[klasor_adi][desen_idx]
-                
-                # Frame oluştur
-                item_frame = ctk.CTkFrame(self.klasor_listesi, corner_radius=6)
-                item_frame.grid(row=i, column=0, padx=5, pady=5, sticky="ew")
-                item_frame.grid_columnconfigure(1, weight=1)
-                
-                # Checkbox
-                secili = (kategori, klasor_adi, desen_idx) in self.secili_desenler
-                checkbox_var = ctk.BooleanVar(value=secili)
-                checkbox = ctk.CTkCheckBox(
-                    item_frame,
-                    text="",
-                    variable=checkbox_var,
-                    width=30,
-                    command=lambda kat=kategori, k=klasor_adi, d=desen_idx, v=checkbox_var: self.desen_secim_degistir(kat, k, d, v)
-                )
-                checkbox.grid(row=0, column=0, padx=(10, 5), pady=10)
-                
-                # Desen bilgisi butonu
-                kategori_emoji = "🎨" if kategori == "Desenler" else "🔄"
-                klasor_goster = klasor_adi
-                if len(klasor_adi) > 18:
-                    klasor_goster = klasor_adi[:15] + "..."
-                
-                isim_stem = os.path.splitext(desen['ad'])[0]
-                dosya_goster = isim_stem if len(isim_stem) <= 20 else isim_stem[:17] + "..."
-                no_goster = desen.get('numara')
-                no_satir = f"\n# {no_goster}" if no_goster else ""
-                
-                etiket_str = ""
-                if desen['etiketler']:
-                    etiket_kisaltilmis = []
-                    for etiket in desen['etiketler'][:2]:
-                        if len(etiket) > 12:
-                            etiket_kisaltilmis.append(etiket[:9] + "...")
-                        else:
-                            etiket_kisaltilmis.append(etiket)
-                    etiket_str = f"\n🏷️ {', '.join(etiket_kisaltilmis)}"
-                    if len(desen['etiketler']) > 2:
-                        etiket_str += "..."
-                
-                btn = ctk.CTkButton(
-                    item_frame,
-                    text=f"{kategori_emoji} {klasor_goster}\n{dosya_goster}{no_satir}{etiket_str}",
-                    command=lambda kat=kategori, k=klasor_adi, d=desen_idx: self.desene_git(kat, k, d),
-                    fg_color="#1f6aa5",
-                    hover_color="#144870",
-                    height=70,
-                    anchor="center",
-                    font=ctk.CTkFont(size=11)
-                )
-                btn.grid(row=0, column=1, padx=5, pady=5, sticky="ew")
-                
-                bulunan_sayac += 1
-            
-            # PDF oluştur butonu (arama sonuçları için)
-            if self.secili_desenler:
-                pdf_frame = ctk.CTkFrame(self.klasor_listesi, corner_radius=6, fg_color="#1f6aa5")
-                pdf_frame.grid(row=bulunan_sayac, column=0, padx=5, pady=10, sticky="ew")
-                pdf_btn = ctk.CTkButton(
-                    pdf_frame,
-                    text=f"📄 Seçili Desenlerden\nPDF Oluştur ({len(self.secili_desenler)})",
-                    command=self.secili_desenlerden_pdf_secenekleri_goster,
-                    fg_color="#1f6aa5",
-                    hover_color="#144870",
-                    height=50,
-                    font=ctk.CTkFont(size=13, weight="bold")
-                )
-                pdf_btn.pack(padx=5, pady=5, fill="x")
-        else:
+        self.arama_sonuclari = self.arama_sonuclarini_bul(tokens)
+        self._arama_terimi = arama_terimi
+        self._arama_listesini_goster(basa_don=True)
+    
+    def _arama_listesini_goster(self, basa_don=True):
+        """Arama sonuçlarını sanal listede göster - satırlar yalnızca görünürken oluşur"""
+        self._sol_liste_modu = "arama"
+        if not self.arama_sonuclari:
             # Sonuç bulunamadıysa bilgi göster
-            label = ctk.CTkLabel(
-                self.klasor_listesi,
-                text=f"'{arama_terimi}' için\nsonuç bulunamadı",
-                font=ctk.CTkFont(size=12),
-                text_color="gray"
-            )
-            label.grid(row=0, column=0, padx=10, pady=20)
+            self.klasor_listesi.goster([("bilgi", f"'{self._arama_terimi}' için\nsonuç bulunamadı")])
+            return
+        ogeler = [("sonuc", anahtar) for anahtar in self.arama_sonuclari]
+        # PDF oluştur butonu (arama sonuçları için)
+        if self.secili_desenler:
+            ogeler.append(("pdf", len(self.secili_desenler)))
+        self.klasor_listesi.goster(ogeler, basa_don=basa_don)
+    
+    def _arama_sonucu_metni(self, kategori, klasor_adi, desen_idx):
+        """Arama sonucu butonunun metni"""
+        desenler_dict = self.desenler if kategori == "Desenler" else self.varyantlar
+        desenler = desenler_dict.get(klasor_adi)
+        if desenler is None or desen_idx >= len(desenler):
+            return klasor_adi
+        desen = desenler[desen_idx]
+        
+        kategori_emoji = "🎨" if kategori == "Desenler" else "🔄"
+        klasor_goster = klasor_adi
+        if len(klasor_adi) > 18:
+            klasor_goster = klasor_adi[:15] + "..."
+        
+        isim_stem = os.path.splitext(desen['ad'])[0]
+        dosya_goster = isim_stem if len(isim_stem) <= 20 else isim_stem[:17] + "..."
+        no_goster = desen.get('numara')
+        no_satir = f"\n# {no_goster}" if no_goster else ""
+        
+        etiket_str = ""
+        if desen['etiketler']:
+            etiket_kisaltilmis = []
+            for etiket in desen['etiketler'][:2]:
+                if len(etiket) > 12:
+                    etiket_kisaltilmis.append(etiket[:9] + "...")
+                else:
+                    etiket_kisaltilmis.append(etiket)
+            etiket_str = f"\n🏷️ {', '.join(etiket_kisaltilmis)}"
+            if len(desen['etiketler']) > 2:
+                etiket_str += "..."
+        return f"{kategori_emoji} {klasor_goster}\n{dosya_goster}{no_satir}{etiket_str}"
+    
+    def desen_secim_degistir(self, kategori, klasor_adi, desen_idx, secim_var):
+        """Arama sonucundaki checkbox - PDF için seçili desenleri güncelle"""
+        anahtar = (kategori, klasor_adi, desen_idx)
+        if secim_var.get():
+            self.secili_desenler.add(anahtar)
+        else:
+            self.secili_desenler.discard(anahtar)
+        # PDF butonu ve sayısı için listeyi konumu koruyarak yenile
+        if self._sol_liste_modu == "arama":
+            self._arama_listesini_goster(basa_don=False)
+    
+    def arama_sonuclarini_bul(self, tokens):
+        """Tüm kelimeleri içeren desenler - Desenler önce, klasör ve dosya sırasıyla
+        
+        İndeksi kurulmuş klasörler trigram indeksinden, henüz indekslenmemiş (ya da
+        taramayla değişmiş) klasörler doğrusal tarama ile aranır.
+        """
+        indeks_sonuclari = {}
+        for kategori, klasor_adi, idx in self.arama_indeksi.ara(tokens):
+            indeks_sonuclari.setdefault((kategori, klasor_adi), []).append(idx)
+        
+        sonuclar = []
+        for kategori, desenler_dict in (("Desenler", self.desenler), ("Varyantlar", self.varyantlar)):
+            for klasor_adi, desenler in list(desenler_dict.items()):
+                if self.arama_indeksi.klasor_indeksli_mi(kategori, klasor_adi, desenler):
+                    idxler = sorted(indeks_sonuclari.get((kategori, klasor_adi), ()))
+                else:
+                    idxler = []
+                    for idx, desen in enumerate(desenler):
+                        st = desen.get('search_text') or self.olustur_search_text(desen['ad'], desen.get('etiketler', []))
+                        if all(t in st for t in tokens):
+                            idxler.append(idx)
+                sonuclar.extend((kategori, klasor_adi, idx) for idx in idxler)
+        return sonuclar
     
     def desene_git(self, kategori, klasor_adi, desen_index):
         """Belirli bir desene git - kategori değiştirme ile"""
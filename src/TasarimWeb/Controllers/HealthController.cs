@@ -27,7 +27,8 @@ namespace TasarimWeb.Controllers
 
             try
             {
-                var clipResponse = await client.GetAsync($"{clipBase}/healthz");
+                // /readyz model yüklemesini tetiklemez; servis hazırlanırken 503 döner.
+                var clipResponse = await client.GetAsync($"{clipBase}/readyz");
                 if (!clipResponse.IsSuccessStatusCode)
                 {
                     return StatusCode(503, new { status = "degraded", clip = clipResponse.StatusCode.ToString() });